@@ -1,11 +1,11 @@
 import streamlit as st
 from datetime import datetime, timedelta
-import pytz
 import logging
+import time
+import pandas as pd
 from calendar_service import CalendarManager, RecurrenceFrequency
-from config import AppConfig
+from config import AppConfig, get_timezone
 from streamlit_option_menu import option_menu
-import plotly.express as px
 
 # Configure logging
 logging.basicConfig(
@@ -17,139 +17,215 @@ logger = logging.getLogger(__name__)
 # Application configuration accessible throughout the module
 app_config = AppConfig()
 
+# Header timezone, resolved once at import rather than on every rerun
+_MST_TZ = get_timezone('America/Denver')
+_MONTHS = (
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December'
+)
+
+# Day bounds used to turn date pickers into datetime ranges
+_MIDNIGHT = datetime.min.time()
+_END_OF_DAY = datetime.max.time()
+
+# Weekday names in calendar order, and each name's position
+_DAY_ORDER = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+_DAY_IDX = {day: i for i, day in enumerate(_DAY_ORDER)}
+
+# Sidebar menu entries, in display order
+_MENU_OPTIONS = ["Schedule", "Edit", "View", "Smart Scheduler", "Analytics", "Settings"]
+
+# Input placeholders for the Schedule and Edit tabs
+_SCHEDULE_PLACEHOLDER = "e.g., Schedule a team meeting tomorrow at 2pm for 1 hour"
+_EDIT_PLACEHOLDER = "e.g., Reschedule my team meeting to tomorrow at 3pm"
+
+# Static help content shown at the bottom of every page
+_HELP_MARKDOWN = """
+### Quick Guide:
+
+🗓️ **Scheduling Events:**
+- "Schedule a meeting tomorrow at 2pm for 1 hour"
+- "Set up a call with John at john@example.com on Friday at 10am for 30 minutes"
+- "Create a weekly team meeting every Monday at 9am"
+- "Add a doctor's appointment at City Clinic on June 15th at 3pm"
+
+✏️ **Editing Events:**
+- "Reschedule my meeting to tomorrow at 3pm"
+- "Move my call with John to next week"
+- "Cancel tomorrow's team sync"
+- "Add Jane to my project review meeting"
+
+🧠 **Smart Scheduler:**
+- Finds optimal meeting times based on attendees' availability
+- Considers working hours and preferred time ranges
+- Lets you select and schedule the best option with one click
+
+📊 **Analytics:**
+- See patterns in your calendar usage
+- Identify your busiest days and times
+- Analyze time spent by category
+
+⚙️ **Settings:**
+- Change timezone settings
+- Customize notification preferences
+- Adjust display options
+"""
+
+# Custom stylesheet injected by apply_custom_styles()
+_CSS = """
+<style>
+.main .block-container {
+    padding-top: 2rem;
+}
+
+.time-suggestion {
+    border: 1px solid #ddd;
+    border-radius: 8px;
+    padding: 10px;
+    margin-bottom: 10px;
+    background-color: #f9f9f9;
+}
+
+.time-suggestion h4 {
+    margin-top: 0;
+}
+
+.stButton button {
+    width: 100%;
+}
+</style>
+"""
+
+# Session state defaults, applied on the first run of each session
+_DEFAULTS = {
+    'current_timezone': app_config.CALENDAR_CONFIG.TIMEZONE,
+    'dark_mode': app_config.THEME == 'DARK',
+    'event_details': None,
+    'show_confirm': False,
+    'last_schedule_input': "",
+    'last_edit_input': "",
+    'selected_tab': "Schedule",
+    'calendar_stats': None,
+}
+
 def initialize_session_state():
     """Initialize session state variables"""
-    # App Config
-    app_config = AppConfig()
-    
-    # Basic session state vars
-    if 'current_timezone' not in st.session_state:
-        st.session_state.current_timezone = app_config.CALENDAR_CONFIG.TIMEZONE
-    
-    if 'dark_mode' not in st.session_state:
-        st.session_state.dark_mode = app_config.THEME == 'DARK'
-    
-    if 'event_details' not in st.session_state:
-        st.session_state.event_details = None
-    
-    if 'show_confirm' not in st.session_state:
-        st.session_state.show_confirm = False
-    
-    if 'last_schedule_input' not in st.session_state:
-        st.session_state.last_schedule_input = ""
-    
-    if 'last_edit_input' not in st.session_state:
-        st.session_state.last_edit_input = ""
-    
-    if 'selected_tab' not in st.session_state:
-        st.session_state.selected_tab = "Schedule"
-    
-    if 'calendar_stats' not in st.session_state:
-        st.session_state.calendar_stats = None
+    for key, value in _DEFAULTS.items():
+        st.session_state.setdefault(key, value)
 
 def apply_custom_styles():
     """Apply custom CSS styling to the application"""
-    st.markdown("""
-    <style>
-    .main .block-container {
-        padding-top: 2rem;
-    }
-    
-    .time-suggestion {
-        border: 1px solid #ddd;
-        border-radius: 8px;
-        padding: 10px;
-        margin-bottom: 10px;
-        background-color: #f9f9f9;
-    }
-    
-    .time-suggestion h4 {
-        margin-top: 0;
-    }
-    
-    .stButton button {
-        width: 100%;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    # Emitted on every run: Streamlit drops elements a rerun doesn't re-send
+    st.markdown(_CSS, unsafe_allow_html=True)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _header_time_string(minute_bucket: int) -> str:
+    """Format the header clock; reruns within the same minute share the result"""
+    now = datetime.now(_MST_TZ)
+    hour12 = now.hour % 12 or 12
+    ampm = 'AM' if now.hour < 12 else 'PM'
+    return f"{hour12:02d}:{now.minute:02d} {ampm} MST on {_MONTHS[now.month - 1]} {now.day:02d}, {now.year}"
 
 def render_header():
     """Render the application header with current time display"""
     try:
-        app_config = AppConfig()
         st.title(app_config.APP_TITLE)
-        current_time_mst = datetime.now(pytz.timezone('America/Denver'))
-        st.write(f"Current time: {current_time_mst.strftime('%I:%M %p MST on %B %d, %Y')}")
+        st.write(f"Current time: {_header_time_string(int(time.time() // 60))}")
     except Exception as e:
         logger.error(f"Error in render_header: {str(e)}")
         st.error("Failed to render header. Please refresh the page.")
 
-def initialize_calendar():
-    """Initialize the calendar manager in session state"""
-    if 'calendar' not in st.session_state:
-        try:
-            st.session_state.calendar = CalendarManager()
-            logger.info("Calendar manager initialized successfully")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to initialize calendar: {str(e)}")
-            st.error(f"Failed to initialize calendar: {str(e)}")
-            return False
-    return True
+@st.cache_resource(show_spinner=False)
+def get_calendar_manager() -> CalendarManager:
+    """Build the calendar manager once per process and share it across sessions"""
+    calendar = CalendarManager()
+    logger.info("Calendar manager initialized successfully")
+    return calendar
 
-def handle_scheduling(user_input):
-    """Process a scheduling request and display the interpreted details"""
+def handle_scheduling(user_input, calendar):
+    """Interpret a scheduling request and store the details for confirmation"""
     try:
-        event_details = st.session_state.calendar.process_user_command(user_input)
+        event_details = calendar.process_user_command(user_input)
         
         if event_details:
-            with st.container():
-                st.write("📅 Interpreted Event Details (Mountain Time):")
-                st.write(f"📌 Title: {event_details['title']}")
-                st.write(f"📆 Date: {event_details['date']}")
-                st.write(f"🕒 Time: {event_details['time']} MST")
-                st.write(f"⏱️ Duration: {event_details['duration']} minutes")
-                st.write(f"📝 Description: {event_details.get('description', 'No description provided')}")
-                
-                # Add recurrence options if needed
-                if event_details.get('is_recurring', False):
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        frequency = st.selectbox(
-                            "Recurrence Frequency",
-                            [f.value for f in RecurrenceFrequency],
-                            format_func=lambda x: x.capitalize()
-                        )
-                    with col2:
-                        count = st.number_input("Number of occurrences", min_value=1, max_value=365, value=10)
-                    with col3:
-                        interval = st.number_input("Interval", min_value=1, max_value=12, value=1)
-                    
-                    event_details['recurrence'] = {
-                        'frequency': RecurrenceFrequency(frequency),
-                        'count': count,
-                        'interval': interval
-                    }
-                
-                # Add category selection
-                categories = st.session_state.calendar.get_event_categories()
-                selected_category = st.selectbox("Event Category", categories)
-                event_details['category'] = selected_category
-                
-                st.session_state.event_details = event_details
-                st.session_state.show_confirm = True
-                logger.info(f"Successfully processed scheduling request: {event_details['title']}")
+            st.session_state.event_details = event_details
+            st.session_state.show_confirm = True
+            logger.info(f"Successfully processed scheduling request: {event_details['title']}")
         else:
+            st.session_state.show_confirm = False
             st.warning("Could not interpret the event details. Please try again with clearer information.")
             logger.warning(f"Failed to process scheduling request: {user_input}")
     except Exception as e:
         logger.error(f"Error in handle_scheduling: {str(e)}")
         st.error("An error occurred while processing your request. Please try again.")
 
-def handle_editing(edit_input):
+def _on_schedule_click(calendar):
+    """Button callback: interpret the Schedule tab input before the rerun"""
+    user_input = st.session_state.schedule_input
+    st.session_state.last_schedule_input = user_input
+    if user_input:
+        handle_scheduling(user_input, calendar)
+    else:
+        st.warning("Please enter event details")
+
+@st.fragment
+def _confirm_fragment(calendar):
+    """Display the interpreted event details and let the user confirm them"""
+    try:
+        event_details = st.session_state.event_details
+        
+        # Already added; the fragment can still rerun on its own before the
+        # next full rerun drops it
+        if event_details is None:
+            return
+        
+        with st.container():
+            st.markdown(
+                "📅 Interpreted Event Details (Mountain Time):\n\n"
+                f"📌 **Title:** {event_details['title']}\n\n"
+                f"📆 **Date:** {event_details['date']}\n\n"
+                f"🕒 **Time:** {event_details['time']} MST\n\n"
+                f"⏱️ **Duration:** {event_details['duration']} minutes\n\n"
+                f"📝 **Description:** {event_details.get('description', 'No description provided')}"
+            )
+            
+            # Add recurrence options if needed
+            if event_details.get('is_recurring', False):
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    frequency = st.selectbox(
+                        "Recurrence Frequency",
+                        [f.value for f in RecurrenceFrequency],
+                        format_func=lambda x: x.capitalize()
+                    )
+                with col2:
+                    count = st.number_input("Number of occurrences", min_value=1, max_value=365, value=10)
+                with col3:
+                    interval = st.number_input("Interval", min_value=1, max_value=12, value=1)
+                
+                # Keys read by CalendarManager.add_to_calendar
+                event_details['recurrence_pattern'] = frequency
+                event_details['recurrence_count'] = count
+                event_details['recurrence_interval'] = interval
+            
+            # Add category selection
+            categories = calendar.get_event_categories()
+            selected_category = st.selectbox("Event Category", categories)
+            event_details['category'] = selected_category
+            
+            if st.button("✅ Add to Calendar", type="primary", key="confirm_button"):
+                result = calendar.add_to_calendar(event_details)
+                st.session_state.show_confirm = False
+                st.session_state.event_details = None
+                st.success(result)
+    except Exception as e:
+        logger.error(f"Error in _confirm_fragment: {str(e)}")
+        st.error(f"Failed to add event: {str(e)}")
+
+def handle_editing(edit_input, calendar):
     """Process an edit request and display the result"""
     try:
-        result = st.session_state.calendar.process_edit_command(edit_input)
+        result = calendar.process_edit_command(edit_input)
         if result:
             st.success(result)
             logger.info(f"Successfully processed edit request: {edit_input}")
@@ -160,55 +236,135 @@ def handle_editing(edit_input):
         logger.error(f"Error in handle_editing: {str(e)}")
         st.error("An error occurred while processing your edit request. Please try again.")
 
-def handle_calendar_view():
+@st.fragment
+def handle_calendar_view(calendar):
     """Display upcoming events from the calendar"""
     with st.spinner("Loading calendar..."):
         try:
-            # Add search functionality
-            search_query = st.text_input("🔍 Search events", placeholder="Search by title, description, or category")
+            # Search and date filters commit together on submit
+            with st.form("cal_filters"):
+                # Add search functionality
+                search_query = st.text_input("🔍 Search events", placeholder="Search by title, description, or category")
+                
+                # Add date range filter
+                col1, col2 = st.columns(2)
+                with col1:
+                    start_date = st.date_input("Start Date", datetime.now())
+                with col2:
+                    end_date = st.date_input("End Date", datetime.now() + timedelta(days=30))
+                
+                st.form_submit_button("Apply")
             
-            # Add date range filter
-            col1, col2 = st.columns(2)
-            with col1:
-                start_date = st.date_input("Start Date", datetime.now())
-            with col2:
-                end_date = st.date_input("End Date", datetime.now() + timedelta(days=30))
+            if st.button("🔄 Force Refresh", key="view_refresh"):
+                calendar.clear_event_cache()
             
             if search_query:
-                events = st.session_state.calendar.search_events(
+                events = calendar.search_events(
                     search_query,
-                    datetime.combine(start_date, datetime.min.time()),
-                    datetime.combine(end_date, datetime.max.time())
+                    datetime.combine(start_date, _MIDNIGHT, tzinfo=get_timezone(st.session_state.current_timezone)),
+                    datetime.combine(end_date, _END_OF_DAY, tzinfo=get_timezone(st.session_state.current_timezone))
                 )
             else:
-                events = st.session_state.calendar.get_upcoming_events()
+                events = calendar.get_upcoming_events()
             
             if not events:
                 st.info('No events found')
             else:
                 st.write("📅 Events (Mountain Time):")
-                for event in events:
-                    with st.expander(f"🗓️ {event}"):
-                        # Add category management
-                        if isinstance(event, dict) and 'id' in event:
-                            categories = st.session_state.calendar.get_event_categories()
-                            selected_category = st.selectbox(
-                                "Category",
-                                categories,
-                                key=f"category_{event['id']}"
-                            )
-                            if st.button("Update Category", key=f"update_{event['id']}"):
-                                result = st.session_state.calendar.add_event_category(
-                                    event['id'],
-                                    selected_category
-                                )
-                                st.success(result)
+                
+                # Pre-formatted upcoming events have nothing to expand, so
+                # send them as a single markdown list
+                event_lines = [event for event in events if isinstance(event, str)]
+                if event_lines:
+                    st.markdown("\n".join(f"- 🗓️ {event}" for event in event_lines))
+                
+                # Search results are event dicts; show them in one editable
+                # table instead of an expander and widgets per event
+                event_dicts = [event for event in events if isinstance(event, dict) and 'id' in event]
+                if event_dicts:
+                    categories = calendar.get_event_categories()
+                    original = pd.DataFrame([
+                        {
+                            'id': event['id'],
+                            'Event': event.get('summary', ''),
+                            'Start': event['start'].get('dateTime', event['start'].get('date')),
+                            'Category': event.get('extendedProperties', {}).get('private', {}).get('category')
+                        }
+                        for event in event_dicts
+                    ])
+                    edited = st.data_editor(
+                        original,
+                        column_config={
+                            'id': None,
+                            'Category': st.column_config.SelectboxColumn("Category", options=categories)
+                        },
+                        disabled=['Event', 'Start'],
+                        hide_index=True,
+                        key="events_editor"
+                    )
+                    
+                    # Apply all category edits in one call
+                    changed = edited['Category'].ne(original['Category']) & edited['Category'].notna()
+                    if changed.any() and st.button(f"Update {int(changed.sum())} Categories", key="update_categories"):
+                        changes = list(zip(edited.loc[changed, 'id'], edited.loc[changed, 'Category']))
+                        results = calendar.add_event_categories(changes)
+                        st.success("\n\n".join(results))
         except Exception as e:
             logger.error(f"Error in handle_calendar_view: {str(e)}")
             st.error("Failed to load calendar events. Please try again.")
 
+@st.cache_data(show_spinner=False)
+def _build_count_bar_figure(labels, counts, axis_title, title):
+    """Build a bar chart of event counts, returned as a Plotly figure dict"""
+    # Imported here so plotly only loads once Analytics is used
+    import plotly.express as px
+    
+    fig = px.bar(
+        x=list(labels),
+        y=list(counts),
+        labels={'x': axis_title, 'y': 'Number of Events'},
+        color_discrete_sequence=['#4C78A8']
+    )
+    
+    fig.update_layout(
+        title=title,
+        xaxis_title=axis_title,
+        yaxis_title="Number of Events"
+    )
+    
+    return fig.to_dict()
+
+@st.cache_data(show_spinner=False)
+def _build_category_figures(category_names, category_counts):
+    """Build the category pie and bar charts, returned as Plotly figure dicts"""
+    import plotly.express as px
+    
+    # Create pie chart for categories
+    pie = px.pie(
+        names=list(category_names),
+        values=list(category_counts),
+        title="Event Categories Distribution"
+    )
+    
+    # Create a bar chart for better readability
+    bar = px.bar(
+        x=list(category_names),
+        y=list(category_counts),
+        labels={'x': 'Category', 'y': 'Number of Events'},
+        color=list(category_names)
+    )
+    
+    bar.update_layout(
+        title="Events by Category",
+        xaxis_title="Category",
+        yaxis_title="Number of Events"
+    )
+    
+    return pie.to_dict(), bar.to_dict()
+
 # Handler function for analytics view
-def handle_analytics():
+@st.fragment
+def handle_analytics(calendar):
     """Display analytics and insights about calendar usage"""
     try:
         # Date range selector for analytics
@@ -234,12 +390,12 @@ def handle_analytics():
         if st.button("Generate Analytics", type="primary"):
             with st.spinner("Analyzing your calendar..."):
                 # Convert to datetime objects with timezone
-                timezone = pytz.timezone(st.session_state.current_timezone)
-                start_datetime = timezone.localize(datetime.combine(start_date, datetime.min.time()))
-                end_datetime = timezone.localize(datetime.combine(end_date, datetime.max.time()))
+                timezone = get_timezone(st.session_state.current_timezone)
+                start_datetime = datetime.combine(start_date, _MIDNIGHT, tzinfo=timezone)
+                end_datetime = datetime.combine(end_date, _END_OF_DAY, tzinfo=timezone)
                 
                 # Get calendar stats
-                stats = st.session_state.calendar.get_calendar_stats(start_datetime, end_datetime)
+                stats = calendar.get_calendar_stats(start_datetime, end_datetime)
                 
                 # Store in session state
                 st.session_state.calendar_stats = stats
@@ -281,24 +437,12 @@ def handle_analytics():
                         st.subheader("Busiest Hours")
                         
                         busy_hours = stats.get('busy_hours', {})
-                        hours = list(busy_hours.keys())
-                        counts = list(busy_hours.values())
                         
                         # Convert hour numbers to formatted time
-                        hour_labels = [f"{int(h)}:00" for h in hours]
-                        
-                        fig = px.bar(
-                            x=hour_labels,
-                            y=counts,
-                            labels={'x': 'Hour of Day', 'y': 'Number of Events'},
-                            color=counts,
-                            color_continuous_scale='Viridis'
-                        )
+                        hour_labels = [f"{int(h)}:00" for h in busy_hours]
                         
-                        fig.update_layout(
-                            title="Events by Hour of Day",
-                            xaxis_title="Hour of Day",
-                            yaxis_title="Number of Events"
+                        fig = _build_count_bar_figure(
+                            tuple(hour_labels), tuple(busy_hours.values()), "Hour of Day", "Events by Hour of Day"
                         )
                         
                         st.plotly_chart(fig, use_container_width=True)
@@ -310,27 +454,14 @@ def handle_analytics():
                         busy_days = stats.get('busy_days', {})
                         
                         # Order days of week properly
-                        day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-                        ordered_days = []
-                        ordered_counts = []
-                        
-                        for day in day_order:
-                            if day in busy_days:
-                                ordered_days.append(day)
-                                ordered_counts.append(busy_days[day])
-                        
-                        fig = px.bar(
-                            x=ordered_days,
-                            y=ordered_counts,
-                            labels={'x': 'Day of Week', 'y': 'Number of Events'},
-                            color=ordered_counts,
-                            color_continuous_scale='Viridis'
+                        pairs = sorted(
+                            (kv for kv in busy_days.items() if kv[0] in _DAY_IDX),
+                            key=lambda kv: _DAY_IDX[kv[0]]
                         )
+                        ordered_days, ordered_counts = zip(*pairs) if pairs else ((), ())
                         
-                        fig.update_layout(
-                            title="Events by Day of Week",
-                            xaxis_title="Day of Week",
-                            yaxis_title="Number of Events"
+                        fig = _build_count_bar_figure(
+                            ordered_days, ordered_counts, "Day of Week", "Events by Day of Week"
                         )
                         
                         st.plotly_chart(fig, use_container_width=True)
@@ -344,29 +475,9 @@ def handle_analytics():
                         category_names = list(categories.keys())
                         category_counts = list(categories.values())
                         
-                        # Create pie chart for categories
-                        fig = px.pie(
-                            names=category_names,
-                            values=category_counts,
-                            title="Event Categories Distribution"
-                        )
+                        fig, fig2 = _build_category_figures(tuple(category_names), tuple(category_counts))
                         
                         st.plotly_chart(fig, use_container_width=True)
-                        
-                        # Create a bar chart for better readability
-                        fig2 = px.bar(
-                            x=category_names,
-                            y=category_counts,
-                            labels={'x': 'Category', 'y': 'Number of Events'},
-                            color=category_names
-                        )
-                        
-                        fig2.update_layout(
-                            title="Events by Category",
-                            xaxis_title="Category",
-                            yaxis_title="Number of Events"
-                        )
-                        
                         st.plotly_chart(fig2, use_container_width=True)
                     else:
                         st.info("No category data available. Try categorizing your events to see analytics.")
@@ -378,7 +489,17 @@ def handle_analytics():
         logger.error(f"Error in handle_analytics: {str(e)}")
         st.error(f"Error generating analytics: {str(e)}")
 
+@st.cache_data(show_spinner=False)
+def _timezone_choices():
+    """Timezone values, their labels and a value-to-index lookup for the settings selectbox"""
+    timezone_options = app_config.get_all_timezone_choices()
+    timezone_values = [tz["value"] for tz in timezone_options]
+    timezone_labels = {tz["value"]: tz["label"] for tz in timezone_options}
+    timezone_index = {value: i for i, value in enumerate(timezone_values)}
+    return timezone_values, timezone_labels, timezone_index
+
 # Handler function for settings
+@st.fragment
 def handle_settings():
     """Display and manage application settings"""
     try:
@@ -405,16 +526,13 @@ def handle_settings():
             # Timezone selection
             st.markdown("### Timezone Settings")
             
-            timezone_options = app_config.get_all_timezone_choices()
-            timezone_values = [tz["value"] for tz in timezone_options]
-            timezone_labels = [tz["label"] for tz in timezone_options]
-            
-            current_index = timezone_values.index(st.session_state.current_timezone) if st.session_state.current_timezone in timezone_values else 0
+            timezone_values, timezone_labels, timezone_index = _timezone_choices()
+            current_index = timezone_index.get(st.session_state.current_timezone, 0)
             
             selected_timezone = st.selectbox(
                 "Timezone",
                 options=timezone_values,
-                format_func=lambda x: x.replace("_", " "),
+                format_func=timezone_labels.get,
                 index=current_index,
                 key="timezone_select"
             )
@@ -501,9 +619,30 @@ def handle_settings():
         logger.error(f"Error in handle_settings: {str(e)}")
         st.error(f"Error displaying settings: {str(e)}")
 
+def _confidence_emoji(confidence):
+    """Traffic-light indicator for a suggestion's confidence score"""
+    return "🟢" if confidence > 0.7 else "🟡" if confidence > 0.4 else "🔴"
+
+def _on_schedule_suggestion():
+    """Button callback: hand the picked suggestion over to the Schedule tab"""
+    pick = st.session_state.get('smart_pick')
+    if pick is None:
+        return
+    st.session_state.event_details = st.session_state.smart_suggestions[pick]['event_details']
+    st.session_state.show_confirm = True
+    st.session_state.selected_tab = "Schedule"
+    st.session_state.switch_tab = True
+
 # Handler for smart scheduler
-def handle_smart_scheduler():
+@st.fragment
+def handle_smart_scheduler(calendar):
     """Smart meeting scheduler that finds optimal meeting times"""
+    # A suggestion was picked; the tab switch needs a full app rerun. Kept
+    # outside the try below, which would otherwise swallow st.rerun()'s
+    # control-flow exception
+    if st.session_state.get('switch_tab'):
+        st.rerun()
+        
     try:
         st.subheader("🧠 Smart Meeting Scheduler")
         
@@ -583,12 +722,12 @@ def handle_smart_scheduler():
             else:
                 with st.spinner("Finding optimal meeting times..."):
                     # Convert to datetime objects with timezone
-                    timezone = pytz.timezone(st.session_state.current_timezone)
-                    start_datetime = timezone.localize(datetime.combine(start_date, datetime.min.time()))
-                    end_datetime = timezone.localize(datetime.combine(end_date, datetime.max.time()))
+                    timezone = get_timezone(st.session_state.current_timezone)
+                    start_datetime = datetime.combine(start_date, _MIDNIGHT, tzinfo=timezone)
+                    end_datetime = datetime.combine(end_date, _END_OF_DAY, tzinfo=timezone)
                     
                     # Get suggested times
-                    suggested_times = st.session_state.calendar.suggest_optimal_meeting_time(
+                    suggested_times = calendar.suggest_optimal_meeting_time(
                         attendees=attendee_list,
                         duration_minutes=meeting_duration,
                         start_date=start_datetime,
@@ -597,59 +736,85 @@ def handle_smart_scheduler():
                     )
                     
                     if not suggested_times:
+                        st.session_state.smart_suggestions = None
                         st.warning("No suitable meeting times found. Try adjusting your parameters.")
                     else:
-                        st.success(f"Found {len(suggested_times)} optimal meeting times!")
-                        
-                        # Display suggestions
-                        st.markdown("### Suggested Meeting Times")
+                        # Parse all suggestion times in one vectorized call each
+                        starts = pd.to_datetime([s['start'] for s in suggested_times], utc=True).tz_convert(timezone)
+                        ends = pd.to_datetime([s['end'] for s in suggested_times], utc=True).tz_convert(timezone)
                         
-                        for i, suggestion in enumerate(suggested_times):
-                            # Parse times
-                            start_time = datetime.fromisoformat(suggestion['start'].replace('Z', '+00:00'))
-                            end_time = datetime.fromisoformat(suggestion['end'].replace('Z', '+00:00'))
-                            
-                            # Format for display
-                            date_str = start_time.strftime('%A, %B %d, %Y')
-                            time_str = f"{start_time.strftime('%I:%M %p')} - {end_time.strftime('%I:%M %p')}"
-                            
-                            # Confidence indicator
-                            confidence = suggestion.get('confidence', 0.5)
-                            confidence_emoji = "🟢" if confidence > 0.7 else "🟡" if confidence > 0.4 else "🔴"
-                            
-                            # Create interactive card
-                            with st.container():
-                                st.markdown(f"""
-                                <div class="time-suggestion">
-                                    <h4>{confidence_emoji} Option {i+1}: {date_str}</h4>
-                                    <p>{time_str}</p>
-                                </div>
-                                """, unsafe_allow_html=True)
-                                
-                                # Schedule button
-                                if st.button(f"Schedule This Time", key=f"schedule_{i}"):
-                                    # Create event details
-                                    event_details = {
-                                        'title': meeting_title,
-                                        'date': start_time.strftime('%Y-%m-%d'),
-                                        'time': start_time.strftime('%H:%M'),
-                                        'duration': meeting_duration,
-                                        'attendees': attendee_list,
-                                        'category': 'Meeting'
-                                    }
-                                    
-                                    # Store in session state and switch to Schedule tab
-                                    st.session_state.event_details = event_details
-                                    st.session_state.show_confirm = True
-                                    st.session_state.selected_tab = "Schedule"
-                                    st.experimental_rerun()
+                        # Keep the suggestions in session state so picking one
+                        # survives the rerun triggered by the radio
+                        st.session_state.smart_suggestions = [
+                            {
+                                'label': f"Option {i+1}: {start_time:%a %b %d %I:%M %p}",
+                                'date_str': start_time.strftime('%A, %B %d, %Y'),
+                                'time_str': f"{start_time.strftime('%I:%M %p')} - {end_time.strftime('%I:%M %p')}",
+                                'confidence': suggestion.get('confidence', 0.5),
+                                'event_details': {
+                                    'title': meeting_title,
+                                    'date': start_time.strftime('%Y-%m-%d'),
+                                    'time': start_time.strftime('%H:%M'),
+                                    'duration': meeting_duration,
+                                    'attendees': attendee_list,
+                                    'category': 'Meeting'
+                                }
+                            }
+                            for i, (suggestion, start_time, end_time) in enumerate(zip(suggested_times, starts, ends))
+                        ]
+                        st.session_state.smart_pick = None
+        
+        # Display suggestions from the last search
+        suggestions = st.session_state.get('smart_suggestions')
+        if suggestions:
+            st.success(f"Found {len(suggestions)} optimal meeting times!")
+            st.markdown("### Suggested Meeting Times")
+            
+            # Render every card in a single markdown element
+            cards = "".join(
+                f"<div class=\"time-suggestion\">"
+                f"<h4>{_confidence_emoji(suggestion['confidence'])} Option {i+1}: {suggestion['date_str']}</h4>"
+                f"<p>{suggestion['time_str']}</p>"
+                f"</div>"
+                for i, suggestion in enumerate(suggestions)
+            )
+            st.markdown(cards, unsafe_allow_html=True)
+            
+            # One picker and one button instead of a button per suggestion
+            choice = st.radio(
+                "Pick one",
+                options=range(len(suggestions)),
+                format_func=lambda i: suggestions[i]['label'],
+                index=None,
+                key="smart_pick"
+            )
+            st.button(
+                "Schedule selected",
+                disabled=choice is None,
+                on_click=_on_schedule_suggestion
+            )
     except Exception as e:
         logger.error(f"Error in handle_smart_scheduler: {str(e)}")
         st.error(f"Error using smart scheduler: {str(e)}")
 
+@st.fragment
+def _render_help():
+    """Render the help expander; it only reruns on its own interactions"""
+    with st.expander("ℹ️ Help & Tips"):
+        st.markdown(_HELP_MARKDOWN)
+
 # Main application function
 def main():
     """Main application function"""
+    # Calendar manager is required by every tab; on failure only the
+    # error is rendered
+    try:
+        calendar = get_calendar_manager()
+    except Exception as e:
+        logger.error(f"Failed to initialize calendar: {str(e)}")
+        st.error(f"Failed to initialize calendar: {str(e)}")
+        return
+    
     # Initialize session state
     initialize_session_state()
     
@@ -661,12 +826,18 @@ def main():
     
     # Sidebar menu
     with st.sidebar:
+        # Honour a tab switch requested by a callback (e.g. the smart scheduler)
+        manual_select = None
+        if st.session_state.pop('switch_tab', False):
+            manual_select = _MENU_OPTIONS.index(st.session_state.selected_tab)
+        
         selected_tab = option_menu(
             "Menu",
-            ["Schedule", "Edit", "View", "Smart Scheduler", "Analytics", "Settings"],
+            _MENU_OPTIONS,
             icons=['calendar-plus', 'pencil', 'calendar-week', 'lightbulb', 'graph-up', 'gear'],
             menu_icon="bars",
             default_index=0,
+            manual_select=manual_select,
             key="main_menu"
         )
         
@@ -681,23 +852,19 @@ def main():
         st.subheader("📝 Schedule a New Event")
         
         # User input
-        user_input = st.text_input(
+        st.text_input(
             "Describe your event in natural language:",
             value=st.session_state.last_schedule_input,
-            placeholder="e.g., Schedule a team meeting tomorrow at 2pm for 1 hour",
+            placeholder=_SCHEDULE_PLACEHOLDER,
             key="schedule_input"
         )
         
-        # Process button
-        if st.button("🔍 Interpret Request", type="primary", key="schedule_button"):
-            if user_input:
-                handle_scheduling(user_input)
-            else:
-                st.warning("Please enter event details")
+        # Process button; interpretation happens in the click callback
+        st.button("🔍 Interpret Request", type="primary", key="schedule_button", on_click=_on_schedule_click, args=(calendar,))
         
         # Show confirmation section if needed
         if st.session_state.show_confirm and st.session_state.event_details:
-            handle_scheduling(user_input)  # Re-run to show the form
+            _confirm_fragment(calendar)
     
     elif selected_tab == "Edit":
         st.subheader("✏️ Edit or Reschedule an Event")
@@ -706,62 +873,32 @@ def main():
         edit_input = st.text_input(
             "Describe what you want to change:",
             value=st.session_state.last_edit_input,
-            placeholder="e.g., Reschedule my team meeting to tomorrow at 3pm",
+            placeholder=_EDIT_PLACEHOLDER,
             key="edit_input"
         )
         
         # Process button
         if st.button("🔄 Process Edit", type="primary", key="edit_button"):
             if edit_input:
-                handle_editing(edit_input)
+                handle_editing(edit_input, calendar)
             else:
                 st.warning("Please enter edit details")
     
     elif selected_tab == "View":
         st.subheader("👁️ View Calendar")
-        handle_calendar_view()
+        handle_calendar_view(calendar)
     
     elif selected_tab == "Smart Scheduler":
-        handle_smart_scheduler()
+        handle_smart_scheduler(calendar)
     
     elif selected_tab == "Analytics":
-        handle_analytics()
+        handle_analytics(calendar)
     
     elif selected_tab == "Settings":
         handle_settings()
         
     # Add help section at the bottom of every page
-    with st.expander("ℹ️ Help & Tips"):
-        st.markdown("""
-        ### Quick Guide:
-        
-        🗓️ **Scheduling Events:**
-        - "Schedule a meeting tomorrow at 2pm for 1 hour"
-        - "Set up a call with John at john@example.com on Friday at 10am for 30 minutes"
-        - "Create a weekly team meeting every Monday at 9am"
-        - "Add a doctor's appointment at City Clinic on June 15th at 3pm"
-        
-        ✏️ **Editing Events:**
-        - "Reschedule my meeting to tomorrow at 3pm"
-        - "Move my call with John to next week"
-        - "Cancel tomorrow's team sync"
-        - "Add Jane to my project review meeting"
-        
-        🧠 **Smart Scheduler:**
-        - Finds optimal meeting times based on attendees' availability
-        - Considers working hours and preferred time ranges
-        - Lets you select and schedule the best option with one click
-        
-        📊 **Analytics:**
-        - See patterns in your calendar usage
-        - Identify your busiest days and times
-        - Analyze time spent by category
-        
-        ⚙️ **Settings:**
-        - Change timezone settings
-        - Customize notification preferences
-        - Adjust display options
-        """)
+    _render_help()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
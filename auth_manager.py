@@ -13,9 +13,12 @@ class GoogleAuthManager:
     def get_credentials(self):
         """Get and refresh Google OAuth credentials"""
         creds = None
+        self._migrate_legacy_token()
         if os.path.exists(self.config.TOKEN_FILE):
-            with open(self.config.TOKEN_FILE, 'rb') as token:
-                creds = pickle.load(token)
+            creds = Credentials.from_authorized_user_file(
+                self.config.TOKEN_FILE,
+                self.config.SCOPES
+            )
                 
         if not creds or not creds.valid:
             if creds and creds.expired and creds.refresh_token:
@@ -31,7 +34,21 @@ class GoogleAuthManager:
                     st.error(f"Authentication error: {str(e)}")
                     raise
                 
-            with open(self.config.TOKEN_FILE, 'wb') as token:
-                pickle.dump(creds, token)
+            with open(self.config.TOKEN_FILE, 'w') as token:
+                token.write(creds.to_json())
         
         return creds
+        
+    def _migrate_legacy_token(self):
+        """Convert a token.pickle from older versions to the JSON token file, once"""
+        legacy = self.config.LEGACY_TOKEN_FILE
+        if not legacy or os.path.exists(self.config.TOKEN_FILE) or not os.path.exists(legacy):
+            return
+            
+        with open(legacy, 'rb') as token:
+            creds = pickle.load(token)
+        with open(self.config.TOKEN_FILE, 'w') as token:
+            token.write(creds.to_json())
+            
+        # Don't leave the old credentials lying around on disk
+        os.remove(legacy)
@@ -1,25 +1,144 @@
 # File: calendar_service.py
 
 import streamlit as st
-from datetime import datetime, timedelta
-import pytz
+from datetime import datetime, timedelta, date, time as dt_time
 import re
-import json
 import time
-import base64
+import bisect
+import functools
+import zipfile
 from io import BytesIO
-from googleapiclient.discovery import build
+import httplib2
+import google_auth_httplib2
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
 from auth_manager import GoogleAuthManager
 from event_processor import EventProcessor
-from config import CalendarConfig, AppConfig, RecurrenceFrequency
-from typing import Dict, List, Any, Optional, Union, Tuple
+from config import CalendarConfig, AppConfig, RecurrenceFrequency, get_timezone
+from typing import Dict, List, Any, Optional, Tuple, Iterator
 import logging
 from utils import create_ical_event, send_notification, analyze_calendar_habits
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Maximum number of calls Google Calendar accepts in one batch request
+BATCH_REQUEST_LIMIT = 50
+
+# Socket timeout (seconds) for Calendar API requests
+HTTP_TIMEOUT = 30
+
+# Fallback formats for event times that aren't ISO, chosen by whether the
+# time carries an AM/PM suffix (e.g. "02:30 PM") or not (e.g. "9:30")
+_FMT_12H = '%Y-%m-%d %I:%M %p'
+_FMT_24H = '%Y-%m-%d %H:%M'
+
+_UTC = get_timezone('UTC')
+
+# Partial-response field masks: only the parts of an event the app reads
+_LIST_FIELDS = 'items(id,summary,description,start,end,htmlLink)'
+_WRITE_FIELDS = 'id,summary,htmlLink'
+# Edit-target search also needs the guest list to decide on notifications
+_PAGE_FIELDS = 'nextPageToken,items(id,summary,description,start,end,htmlLink,attendees(email))'
+_CATEGORY_READ_FIELDS = 'summary,description'
+
+# Categories whose events don't block time (shown as free)
+_TRANSPARENT_CATEGORIES = frozenset({'personal', 'social'})
+
+# Description lines written by _category_patch, replaced on each change
+_CATEGORY_LINE = re.compile(r'^Category:.*\n?', re.MULTILINE)
+
+# Characters replaced with '_' when an event title becomes a file name
+_FILENAME_UNSAFE = str.maketrans({char: '_' for char in ' /\\:*?"<>|'})
+
+# Edit-command keys that map one-to-one onto event fields
+_FIELD_EDITS = {
+    'new_title': 'summary',
+    'new_description': 'description',
+    'new_location': 'location',
+}
+
+# Display format for upcoming event start times
+_UPCOMING_FMT = '%I:%M %p on %B %d, %Y'
+
+# Characters that make a search term a regular expression rather than a literal
+_REGEX_META = re.compile(r'[.^$*+?()\[\]{}|\\]')
+
+@functools.lru_cache(maxsize=256)
+def _compiled(pattern: str) -> re.Pattern:
+    """Compile a case-insensitive search pattern once per process"""
+    return re.compile(pattern, re.IGNORECASE)
+
+@st.cache_resource(show_spinner=False)
+def get_calendar_credentials(credentials_file: str, token_file: str, scopes: Tuple[str, ...]):
+    """Load or refresh the OAuth credentials once per process"""
+    auth_config = CalendarConfig(
+        SCOPES=list(scopes),
+        CREDENTIALS_FILE=credentials_file,
+        TOKEN_FILE=token_file
+    )
+    return GoogleAuthManager(auth_config).get_credentials()
+
+@functools.lru_cache(maxsize=1)
+def _calendar_discovery_doc() -> str:
+    """Read the Calendar discovery document bundled with the client library once"""
+    # Kept as text: building a client annotates the parsed document in place,
+    # so each build gets its own copy rather than a shared dict
+    return get_static_doc('calendar', 'v3')
+
+def _authorized_http(creds) -> google_auth_httplib2.AuthorizedHttp:
+    """Create a new authorized transport with the API socket timeout"""
+    return google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+
+def get_calendar_service(credentials_file: str, token_file: str, scopes: Tuple[str, ...]):
+    """Build a Calendar API client from the shared credentials and discovery document"""
+    creds = get_calendar_credentials(credentials_file, token_file, scopes)
+    
+    # httplib2 is not thread-safe and the client may be used from several
+    # session threads, so every request gets its own authorized transport
+    def build_request(http, *args, **kwargs):
+        return HttpRequest(_authorized_http(creds), *args, **kwargs)
+    
+    return build_from_document(
+        _calendar_discovery_doc(),
+        http=_authorized_http(creds),
+        requestBuilder=build_request
+    )
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_events(_service, account_key: str, time_min: str, time_max: str,
+                  max_results: int) -> List[Dict[str, Any]]:
+    """Fetch events in a window; reruns within the TTL reuse the response"""
+    events_result = _service.events().list(
+        calendarId='primary',
+        timeMin=time_min,
+        timeMax=time_max,
+        maxResults=max_results,
+        singleEvents=True,
+        orderBy='startTime',
+        fields=_LIST_FIELDS
+    ).execute()
+    
+    return events_result.get('items', [])
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _search_events(_service, account_key: str, query: str, time_min: str,
+                   time_max: str) -> List[Dict[str, Any]]:
+    """Fetch events matching a full-text query; reruns within the TTL reuse the response"""
+    events_result = _service.events().list(
+        calendarId='primary',
+        timeMin=time_min,
+        timeMax=time_max,
+        maxResults=50,
+        singleEvents=True,
+        orderBy='startTime',
+        q=query
+    ).execute()
+    
+    return events_result.get('items', [])
+
 class EventStatus(str):
     """Event status constants"""
     CONFIRMED = "confirmed"
@@ -36,16 +155,19 @@ class CalendarManager:
         try:
             self.app_config = AppConfig()
             self.config = config or self.app_config.CALENDAR_CONFIG
-            self.timezone = pytz.timezone(self.config.TIMEZONE)
-            self.auth_manager = GoogleAuthManager(self.config)
-            self.creds = self.auth_manager.get_credentials()
-            self.service = build('calendar', 'v3', credentials=self.creds)
+            self.timezone = get_timezone(self.config.TIMEZONE)
+            self.service = get_calendar_service(
+                self.config.CREDENTIALS_FILE,
+                self.config.TOKEN_FILE,
+                tuple(self.config.SCOPES)
+            )
             self.event_processor = EventProcessor(self.config.TIMEZONE)
             
             # Cache for frequently accessed data
             self._calendars_cache = None
             self._calendars_cache_expiry = 0
-            self._categories_cache = self.app_config.EVENT_CATEGORIES
+            self._categories_list = list(self.app_config.EVENT_CATEGORIES)
+            self._categories_set = set(self._categories_list)
             
             logger.info("CalendarManager initialized successfully")
         except Exception as e:
@@ -64,7 +186,7 @@ class CalendarManager:
         """Get list of available calendars for the user"""
         try:
             # Use cached data if available and not expired
-            current_time = time.time()
+            current_time = time.monotonic()
             if not force_refresh and self._calendars_cache and current_time < self._calendars_cache_expiry:
                 return self._calendars_cache
                 
@@ -87,106 +209,20 @@ class CalendarManager:
     def add_to_calendar(self, event_details: Dict[str, Any]) -> str:
         """Add an event to the calendar with the provided details"""
         try:
-            # Parse date and time
-            date_str = event_details['date']
-            time_str = event_details['time']
-            
-            # Combine date and time
-            datetime_str = f"{date_str} {time_str}"
-            
-            # Try different formats to handle various inputs
-            formats = ['%Y-%m-%d %H:%M', '%Y-%m-%d %I:%M %p']
-            start_datetime = None
-            
-            for fmt in formats:
-                try:
-                    start_datetime = datetime.strptime(datetime_str, fmt)
-                    break
-                except ValueError:
-                    continue
-            
-            if not start_datetime:
-                raise CalendarError("Could not parse date and time format")
-
-            # Convert to timezone-aware datetime
-            start_datetime = self.timezone.localize(start_datetime)
-            end_datetime = start_datetime + timedelta(minutes=event_details['duration'])
-
-            # Create event body
-            event = {
-                'summary': event_details['title'],
-                'description': event_details.get('description', ''),
-                'start': {
-                    'dateTime': start_datetime.isoformat(),
-                    'timeZone': self.config.TIMEZONE,
-                },
-                'end': {
-                    'dateTime': end_datetime.isoformat(),
-                    'timeZone': self.config.TIMEZONE,
-                },
-                'status': EventStatus.CONFIRMED,
-            }
+            event = self._build_event_body(event_details)
             
-            # Add location if provided
-            if 'location' in event_details and event_details['location']:
-                event['location'] = event_details['location']
-            
-            # Add attendees if provided
-            if 'attendees' in event_details and event_details['attendees']:
-                event['attendees'] = [{'email': attendee} for attendee in event_details['attendees'] 
-                                     if '@' in attendee]
-            
-            # Add reminders if specified
-            if 'reminder_minutes' in event_details:
-                event['reminders'] = {
-                    'useDefault': False,
-                    'overrides': [
-                        {'method': 'popup', 'minutes': event_details['reminder_minutes']}
-                    ]
-                }
-            
-            # Add transparency (affects busy/free status)
-            if event_details.get('category', '').lower() in ['personal', 'social']:
-                event['transparency'] = 'transparent'  # Doesn't block time on calendar
-            else:
-                event['transparency'] = 'opaque'  # Default - blocks time on calendar
-                
-            # Add visibility
-            if event_details.get('private', False):
-                event['visibility'] = 'private'
-            else:
-                event['visibility'] = 'default'
-
-            # Add recurrence if specified
-            if event_details.get('is_recurring', False):
-                recurrence_pattern = event_details.get('recurrence_pattern', 'WEEKLY')
-                try:
-                    frequency = RecurrenceFrequency[recurrence_pattern]
-                    recurrence = self._create_recurrence_rule(
-                        frequency,
-                        event_details.get('recurrence_count', 10),  # Default to 10 occurrences
-                        event_details.get('recurrence_interval', 1)  # Default interval is 1
-                    )
-                    event['recurrence'] = [recurrence]
-                except (KeyError, ValueError):
-                    logger.warning(f"Invalid recurrence pattern: {recurrence_pattern}")
-
-            # Add category as extended property
-            if 'category' in event_details:
-                event['extendedProperties'] = {
-                    'private': {'category': event_details['category']}
-                }
-
             # Create the event
             calendar_id = event_details.get('calendar_id', 'primary')
             created_event = self.service.events().insert(
                 calendarId=calendar_id,
                 body=event,
-                sendUpdates='all' if event.get('attendees') else 'none'
+                sendUpdates='all' if event.get('attendees') else 'none',
+                fields=_WRITE_FIELDS
             ).execute()
             
+            self.clear_event_cache()
+            
             event_id = created_event['id']
-            created_time = created_event['created']
             
             # Generate human-readable summary
             summary = self.event_processor.generate_event_summary(event_details)
@@ -210,56 +246,202 @@ class CalendarManager:
             logger.error(f"Error adding event to calendar: {str(e)}")
             raise CalendarError(f"An unexpected error occurred: {str(e)}")
 
+    def add_events_bulk(self, events_details: List[Dict[str, Any]]) -> List[str]:
+        """Add several events to the calendar using batched insert requests"""
+        try:
+            results = []
+            for offset in range(0, len(events_details), BATCH_REQUEST_LIMIT):
+                chunk = events_details[offset:offset + BATCH_REQUEST_LIMIT]
+                
+                def on_insert(request_id, response, exception):
+                    title = chunk[int(request_id)]['title']
+                    if exception is not None:
+                        logger.error(f"Error adding event '{title}': {str(exception)}")
+                        results.append(f"Failed to add event '{title}': {str(exception)}")
+                    else:
+                        logger.info(f"Successfully added event: {title} (ID: {response['id']})")
+                        results.append(f"Event '{title}' has been added to your calendar")
+                        
+                batch = self.service.new_batch_http_request(callback=on_insert)
+                for index, event_details in enumerate(chunk):
+                    event = self._build_event_body(event_details)
+                    batch.add(
+                        self.service.events().insert(
+                            calendarId=event_details.get('calendar_id', 'primary'),
+                            body=event,
+                            sendUpdates='all' if event.get('attendees') else 'none',
+                            fields=_WRITE_FIELDS
+                        ),
+                        request_id=str(index)
+                    )
+                batch.execute()
+                
+            self.clear_event_cache()
+            return results
+        except HttpError as e:
+            logger.error(f"Google Calendar API error: {str(e)}")
+            raise CalendarError(f"Failed to add events to calendar: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error adding events to calendar: {str(e)}")
+            raise CalendarError(f"An unexpected error occurred: {str(e)}")
+            
+    def edit_events_bulk(self, changes: List[Tuple[str, Dict[str, Any]]],
+                         has_attendees: Optional[Dict[str, bool]] = None) -> List[Dict[str, Any]]:
+        """Apply updates to several events given (event_id, updates) pairs"""
+        # Maps event IDs to whether the event has guests; guests are notified
+        # unless an event is known to have none
+        has_attendees = has_attendees or {}
+        try:
+            # Each change is a patch carrying only the modified fields, so no
+            # prior fetch of the events is needed
+            updated = []
+            for offset in range(0, len(changes), BATCH_REQUEST_LIMIT):
+                chunk = changes[offset:offset + BATCH_REQUEST_LIMIT]
+                
+                def on_patch(request_id, response, exception):
+                    if exception is not None:
+                        logger.error(f"Error updating event {chunk[int(request_id)][0]}: {str(exception)}")
+                    else:
+                        logger.info(f"Successfully updated event: {response.get('summary', '')}")
+                        updated.append(response)
+                        
+                batch = self.service.new_batch_http_request(callback=on_patch)
+                for index, (event_id, updates) in enumerate(chunk):
+                    batch.add(
+                        self.service.events().patch(
+                            calendarId='primary',
+                            eventId=event_id,
+                            body=updates,
+                            sendUpdates='none' if has_attendees.get(event_id) is False else 'all',
+                            fields=_WRITE_FIELDS
+                        ),
+                        request_id=str(index)
+                    )
+                batch.execute()
+                    
+            self.clear_event_cache()
+            return updated
+        except HttpError as e:
+            logger.error(f"Google Calendar API error: {str(e)}")
+            raise CalendarError(f"Failed to update events: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error updating events: {str(e)}")
+            raise CalendarError(f"An unexpected error occurred: {str(e)}")
+
+    def _build_event_body(self, event_details: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a Google Calendar event body from parsed event details"""
+        # Parse date and time
+        date_str = event_details['date']
+        time_str = event_details['time']
+        
+        # ISO input (the common case) takes the fromisoformat fast path;
+        # anything else goes to the one strptime format its shape allows
+        try:
+            start_datetime = datetime.fromisoformat(f"{date_str}T{time_str}")
+        except ValueError:
+            fmt = _FMT_12H if time_str.rstrip()[-2:].upper() in ('AM', 'PM') else _FMT_24H
+            try:
+                start_datetime = datetime.strptime(f"{date_str} {time_str}", fmt)
+            except ValueError:
+                raise CalendarError("Could not parse date and time format")
+        
+        # Convert to timezone-aware datetime
+        start_datetime = start_datetime.replace(tzinfo=self.timezone)
+        end_datetime = start_datetime + timedelta(minutes=event_details['duration'])
+        
+        # Read each detail once
+        tz_name = self.config.TIMEZONE
+        location = event_details.get('location')
+        attendees = event_details.get('attendees')
+        reminder_minutes = event_details.get('reminder_minutes')
+        category = event_details.get('category')
+        
+        # Build the recurrence rule if specified
+        recurrence = None
+        if event_details.get('is_recurring', False):
+            recurrence_pattern = event_details.get('recurrence_pattern', 'WEEKLY')
+            try:
+                frequency = RecurrenceFrequency[recurrence_pattern]
+                recurrence = [self._create_recurrence_rule(
+                    frequency,
+                    event_details.get('recurrence_count', 10),  # Default to 10 occurrences
+                    event_details.get('recurrence_interval', 1)  # Default interval is 1
+                )]
+            except (KeyError, ValueError):
+                logger.warning(f"Invalid recurrence pattern: {recurrence_pattern}")
+        
+        # Optional fields; those left as None are omitted from the body
+        optional = {
+            'location': location or None,
+            'attendees': [{'email': attendee} for attendee in attendees if '@' in attendee] if attendees else None,
+            'reminders': {
+                'useDefault': False,
+                'overrides': [{'method': 'popup', 'minutes': reminder_minutes}]
+            } if reminder_minutes is not None else None,
+            'recurrence': recurrence,
+            'extendedProperties': {'private': {'category': category}} if category is not None else None,
+        }
+        
+        # Create event body; transparency affects busy/free status, and
+        # personal/social events don't block time on the calendar
+        return {
+            'summary': event_details['title'],
+            'description': event_details.get('description', ''),
+            'start': {'dateTime': start_datetime.isoformat(), 'timeZone': tz_name},
+            'end': {'dateTime': end_datetime.isoformat(), 'timeZone': tz_name},
+            'status': EventStatus.CONFIRMED,
+            'transparency': 'transparent' if (category or '').lower() in _TRANSPARENT_CATEGORIES else 'opaque',
+            'visibility': 'private' if event_details.get('private', False) else 'default',
+            **{key: value for key, value in optional.items() if value is not None},
+        }
+
     def _create_recurrence_rule(self, frequency: RecurrenceFrequency, count: int, interval: int) -> str:
         """Create an RRULE string for recurring events"""
         return f"RRULE:FREQ={frequency.value};COUNT={count};INTERVAL={interval}"
 
     def get_event_categories(self) -> List[str]:
         """Get list of available event categories"""
-        return self._categories_cache
+        return self._categories_list
         
     def add_custom_category(self, category_name: str) -> bool:
         """Add a custom category to the list of available categories"""
-        if category_name not in self._categories_cache:
-            self._categories_cache.append(category_name)
-            return True
-        return False
+        if category_name in self._categories_set:
+            return False
+        self._categories_set.add(category_name)
+        self._categories_list.append(category_name)
+        return True
+
+    def _category_patch(self, event: Dict[str, Any], category: str) -> Dict[str, Any]:
+        """Build the patch body that sets an event's category property and description line"""
+        # Remove any existing category line from the description
+        filtered_description = _CATEGORY_LINE.sub('', event.get('description', '')).rstrip()
+        
+        # Patch merges the private properties map, so other keys are kept;
+        # the category is also added to the description for compatibility
+        return {
+            'description': filtered_description + f"\nCategory: {category}",
+            'extendedProperties': {'private': {'category': category}},
+        }
 
     def add_event_category(self, event_id: str, category: str) -> str:
         """Add a category to an existing event"""
         try:
+            # Only the current description is needed to build the patch
             event = self.service.events().get(
                 calendarId='primary',
-                eventId=event_id
+                eventId=event_id,
+                fields=_CATEGORY_READ_FIELDS
             ).execute()
 
-            # Add category to extended properties
-            if 'extendedProperties' not in event:
-                event['extendedProperties'] = {'private': {}}
-            elif 'private' not in event['extendedProperties']:
-                event['extendedProperties']['private'] = {}
-                
-            event['extendedProperties']['private']['category'] = category
-            
-            # Also add category to description for compatibility
-            if 'description' not in event:
-                event['description'] = ''
-            
-            # Remove any existing category line
-            description_lines = event['description'].split('\n')
-            filtered_lines = [line for line in description_lines if not line.startswith('Category:')]
-            filtered_description = '\n'.join(filtered_lines)
-            
-            # Add new category line
-            event['description'] = filtered_description + f"\nCategory: {category}"
-            
-            # Update event
-            updated_event = self.service.events().update(
+            # Patch event
+            updated_event = self.service.events().patch(
                 calendarId='primary',
                 eventId=event_id,
-                body=event
+                body=self._category_patch(event, category),
+                fields=_WRITE_FIELDS
             ).execute()
 
+            self.clear_event_cache()
             logger.info(f"Added category '{category}' to event: {event['summary']}")
             return f"Category '{category}' added to event: {event['summary']}"
 
@@ -270,14 +452,75 @@ class CalendarManager:
             logger.error(f"Error adding category: {str(e)}")
             raise CalendarError(f"An unexpected error occurred: {str(e)}")
             
+    def add_event_categories(self, changes: List[Tuple[str, str]]) -> List[str]:
+        """Add categories to several existing events given (event_id, category) pairs"""
+        try:
+            # Fetch the descriptions in one batch request and patch them in a
+            # second, instead of a get/patch round trip per event
+            results = []
+            for offset in range(0, len(changes), BATCH_REQUEST_LIMIT):
+                chunk = changes[offset:offset + BATCH_REQUEST_LIMIT]
+                fetched = {}
+                
+                def on_get(request_id, response, exception):
+                    if exception is not None:
+                        logger.error(f"Error fetching event for category update: {str(exception)}")
+                        results.append(f"Failed to add category to event {chunk[int(request_id)][0]}: {str(exception)}")
+                    else:
+                        fetched[request_id] = response
+                        
+                get_batch = self.service.new_batch_http_request(callback=on_get)
+                for index, (event_id, _) in enumerate(chunk):
+                    get_batch.add(
+                        self.service.events().get(
+                            calendarId='primary', eventId=event_id, fields=_CATEGORY_READ_FIELDS
+                        ),
+                        request_id=str(index)
+                    )
+                get_batch.execute()
+                
+                def on_update(request_id, response, exception):
+                    category = chunk[int(request_id)][1]
+                    if exception is not None:
+                        logger.error(f"Error adding category: {str(exception)}")
+                        results.append(f"Failed to add category '{category}': {str(exception)}")
+                    else:
+                        logger.info(f"Added category '{category}' to event: {response.get('summary', '')}")
+                        results.append(f"Category '{category}' added to event: {response.get('summary', '')}")
+                        
+                update_batch = self.service.new_batch_http_request(callback=on_update)
+                for request_id, event in fetched.items():
+                    event_id, category = chunk[int(request_id)]
+                    update_batch.add(
+                        self.service.events().patch(
+                            calendarId='primary',
+                            eventId=event_id,
+                            body=self._category_patch(event, category),
+                            fields=_WRITE_FIELDS
+                        ),
+                        request_id=request_id
+                    )
+                if fetched:
+                    update_batch.execute()
+                    
+            self.clear_event_cache()
+            return results
+        except HttpError as e:
+            logger.error(f"Google Calendar API error: {str(e)}")
+            raise CalendarError(f"Failed to add categories: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error adding categories: {str(e)}")
+            raise CalendarError(f"An unexpected error occurred: {str(e)}")
+            
     def get_calendar_stats(self, start_date: Optional[datetime] = None, 
                          end_date: Optional[datetime] = None) -> Dict[str, Any]:
         """Get statistics about calendar usage"""
         try:
+            now = datetime.now(self.timezone)
             if not start_date:
-                start_date = datetime.now(self.timezone) - timedelta(days=30)  # Last 30 days
+                start_date = now - timedelta(days=30)  # Last 30 days
             if not end_date:
-                end_date = datetime.now(self.timezone) + timedelta(days=30)  # Next 30 days
+                end_date = now + timedelta(days=30)  # Next 30 days
                 
             events = self.get_events_in_range(start_date, end_date)
             stats = analyze_calendar_habits(events)
@@ -290,16 +533,14 @@ class CalendarManager:
     def get_events_in_range(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
         """Get all events within a specified date range"""
         try:
-            events_result = self.service.events().list(
-                calendarId='primary',
-                timeMin=start_date.isoformat(),
-                timeMax=end_date.isoformat(),
-                maxResults=250,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-
-            return events_result.get('items', [])
+            # Shares the listing cache, so writes invalidate it as well
+            return _fetch_events(
+                self.service,
+                self.config.TOKEN_FILE,
+                start_date.isoformat(),
+                end_date.isoformat(),
+                250
+            )
         except Exception as e:
             logger.error(f"Error getting events in range: {str(e)}")
             return []
@@ -308,13 +549,31 @@ class CalendarManager:
         """Generate an iCalendar file for the event that can be downloaded"""
         try:
             ical_data = create_ical_event(event_details)
-            filename = f"{event_details['title'].replace(' ', '_')}.ics"
+            filename = f"{event_details['title'].translate(_FILENAME_UNSAFE)}.ics"
             
             return ical_data, filename
         except Exception as e:
             logger.error(f"Error generating iCal file: {str(e)}")
             raise CalendarError(f"Failed to generate iCal file: {str(e)}")
             
+    def get_ical_download_bulk(self, events_details: List[Dict[str, Any]]) -> Tuple[bytes, str]:
+        """Generate a zip archive with one iCalendar file per event"""
+        try:
+            buffer = BytesIO()
+            used_names = set()
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for index, event_details in enumerate(events_details):
+                    name = f"{event_details['title'].translate(_FILENAME_UNSAFE)}.ics"
+                    if name in used_names:
+                        name = f"{index + 1}_{name}"
+                    used_names.add(name)
+                    archive.writestr(name, create_ical_event(event_details))
+                    
+            return buffer.getvalue(), "events.zip"
+        except Exception as e:
+            logger.error(f"Error generating iCal archive: {str(e)}")
+            raise CalendarError(f"Failed to generate iCal archive: {str(e)}")
+            
     def get_free_busy_times(self, attendees: List[str], start_time: datetime, 
                           end_time: datetime) -> Dict[str, Any]:
         """Get free/busy information for a list of attendees"""
@@ -375,19 +634,15 @@ class CalendarManager:
             if not end_date:
                 end_date = start_date + timedelta(days=30)
 
-            # Get events from the specified date range
-            events_result = self.service.events().list(
-                calendarId='primary',
-                timeMin=start_date.isoformat(),
-                timeMax=end_date.isoformat(),
-                maxResults=50,
-                singleEvents=True,
-                orderBy='startTime',
-                q=query
-            ).execute()
-
-            events = events_result.get('items', [])
-            return events
+            # Get events from the specified date range through the shared
+            # response cache, so writes invalidate search results as well
+            return _search_events(
+                self.service,
+                self.config.TOKEN_FILE,
+                query,
+                start_date.isoformat(),
+                end_date.isoformat()
+            )
 
         except HttpError as e:
             logger.error(f"Google Calendar API error: {str(e)}")
@@ -419,7 +674,7 @@ class CalendarManager:
             
             # Apply edits based on action type
             if edit_details['action'] == 'cancel':
-                result = self.cancel_event(event_id)
+                result = self.cancel_event(event_id, has_attendees=bool(event.get('attendees')))
                 return f"Cancelled event: {event_summary}"
                 
             elif edit_details['action'] == 'reschedule':
@@ -427,27 +682,31 @@ class CalendarManager:
                 updates = {}
                 
                 if 'new_date' in edit_details or 'new_time' in edit_details:
-                    # Get current start time
+                    # Parse the current start and end once, before any edits
                     start_dt = self._parse_event_datetime(event['start'])
+                    end_dt = self._parse_event_datetime(event['end'])
+                    old_duration = int((end_dt - start_dt).total_seconds() / 60)
                     
                     # Apply new date if provided
                     if 'new_date' in edit_details:
-                        new_date = datetime.strptime(edit_details['new_date'], '%Y-%m-%d').date()
+                        try:
+                            new_date = date.fromisoformat(edit_details['new_date'])
+                        except ValueError:
+                            # Non-padded dates such as "2024-7-1"
+                            new_date = datetime.strptime(edit_details['new_date'], '%Y-%m-%d').date()
                         start_dt = start_dt.replace(year=new_date.year, month=new_date.month, day=new_date.day)
                         
                     # Apply new time if provided
                     if 'new_time' in edit_details:
-                        new_time = datetime.strptime(edit_details['new_time'], '%H:%M').time()
+                        try:
+                            new_time = dt_time.fromisoformat(edit_details['new_time'])
+                        except ValueError:
+                            # Non-padded hours such as "9:30"
+                            new_time = datetime.strptime(edit_details['new_time'], '%H:%M').time()
                         start_dt = start_dt.replace(hour=new_time.hour, minute=new_time.minute)
                         
-                    # Calculate new end time based on duration
-                    if 'new_duration' in edit_details:
-                        duration = edit_details['new_duration']
-                    else:
-                        # Calculate existing duration
-                        end_dt = self._parse_event_datetime(event['end'])
-                        duration = int((end_dt - start_dt).total_seconds() / 60)
-                        
+                    # Calculate new end time, keeping the existing duration by default
+                    duration = edit_details.get('new_duration', old_duration)
                     end_dt = start_dt + timedelta(minutes=duration)
                     
                     # Add to updates
@@ -455,51 +714,24 @@ class CalendarManager:
                     updates['end'] = {'dateTime': end_dt.isoformat(), 'timeZone': self.config.TIMEZONE}
                 
                 # Other updates
-                if 'new_title' in edit_details:
-                    updates['summary'] = edit_details['new_title']
-                    
-                if 'new_description' in edit_details:
-                    updates['description'] = edit_details['new_description']
-                    
-                if 'new_location' in edit_details:
-                    updates['location'] = edit_details['new_location']
+                updates.update(self._field_updates(edit_details))
                 
                 # Apply the updates
-                self.update_event(event_id, updates)
+                if updates:
+                    self.update_event(event_id, updates, has_attendees=bool(event.get('attendees')))
                 
-                # Handle attendee changes
-                if 'add_attendees' in edit_details and edit_details['add_attendees']:
-                    self.add_attendees_to_event(event_id, edit_details['add_attendees'])
-                    
-                if 'remove_attendees' in edit_details and edit_details['remove_attendees']:
-                    self.remove_attendees_from_event(event_id, edit_details['remove_attendees'])
-                    
+                self._apply_attendee_edits(event_id, edit_details)
                 return f"Successfully updated event: {event_summary}"
                 
             elif edit_details['action'] == 'modify':
                 # Handle other modifications
-                updates = {}
-                
-                if 'new_title' in edit_details:
-                    updates['summary'] = edit_details['new_title']
-                    
-                if 'new_description' in edit_details:
-                    updates['description'] = edit_details['new_description']
-                    
-                if 'new_location' in edit_details:
-                    updates['location'] = edit_details['new_location']
+                updates = self._field_updates(edit_details)
                     
                 # Apply the updates
                 if updates:
-                    self.update_event(event_id, updates)
-                    
-                # Handle attendee changes
-                if 'add_attendees' in edit_details and edit_details['add_attendees']:
-                    self.add_attendees_to_event(event_id, edit_details['add_attendees'])
-                    
-                if 'remove_attendees' in edit_details and edit_details['remove_attendees']:
-                    self.remove_attendees_from_event(event_id, edit_details['remove_attendees'])
+                    self.update_event(event_id, updates, has_attendees=bool(event.get('attendees')))
                     
+                self._apply_attendee_edits(event_id, edit_details)
                 return f"Successfully modified event: {event_summary}"
                 
             else:
@@ -509,42 +741,54 @@ class CalendarManager:
             logger.error(f"Error processing edit command: {str(e)}")
             return f"An error occurred while processing your request: {str(e)}"
             
-    def update_event(self, event_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
-        """Update an event with the specified changes"""
-        try:
-            # First get the current event
-            event = self.service.events().get(
-                calendarId='primary',
-                eventId=event_id
-            ).execute()
+    def _field_updates(self, edit_details: Dict[str, Any]) -> Dict[str, Any]:
+        """Map the simple edit keys present in edit_details onto event fields"""
+        return {
+            field: edit_details[key]
+            for key, field in _FIELD_EDITS.items()
+            if key in edit_details
+        }
+        
+    def _apply_attendee_edits(self, event_id: str, edit_details: Dict[str, Any]) -> None:
+        """Add and remove the attendees named in edit_details"""
+        for key, apply in (
+            ('add_attendees', self.add_attendees_to_event),
+            ('remove_attendees', self.remove_attendees_from_event),
+        ):
+            attendees = edit_details.get(key)
+            if attendees:
+                apply(event_id, attendees)
             
-            # Apply updates
-            for key, value in updates.items():
-                event[key] = value
-                
-            # Save the changes
-            updated_event = self.service.events().update(
+    def update_event(self, event_id: str, updates: Dict[str, Any],
+                     has_attendees: Optional[bool] = None) -> Dict[str, Any]:
+        """Update an event with the specified changes; guests are notified unless it is known to have none"""
+        try:
+            # Patch only the changed fields
+            updated_event = self.service.events().patch(
                 calendarId='primary',
                 eventId=event_id,
-                body=event,
-                sendUpdates='all' if event.get('attendees') else 'none'
+                body=updates,
+                sendUpdates='none' if has_attendees is False else 'all',
+                fields=_WRITE_FIELDS
             ).execute()
             
-            logger.info(f"Successfully updated event: {event.get('summary', '')}")
+            self.clear_event_cache()
+            logger.info(f"Successfully updated event: {updated_event.get('summary', '')}")
             return updated_event
         except Exception as e:
             logger.error(f"Error updating event: {str(e)}")
             raise CalendarError(f"Failed to update event: {str(e)}")
             
-    def cancel_event(self, event_id: str) -> Dict[str, Any]:
-        """Cancel (delete) an event"""
+    def cancel_event(self, event_id: str, has_attendees: Optional[bool] = None) -> Dict[str, Any]:
+        """Cancel (delete) an event; guests are notified unless it is known to have none"""
         try:
             cancelled_event = self.service.events().delete(
                 calendarId='primary',
                 eventId=event_id,
-                sendUpdates='all'
+                sendUpdates='none' if has_attendees is False else 'all'
             ).execute()
             
+            self.clear_event_cache()
             logger.info(f"Successfully cancelled event with ID: {event_id}")
             return cancelled_event
         except Exception as e:
@@ -554,30 +798,35 @@ class CalendarManager:
     def add_attendees_to_event(self, event_id: str, attendees: List[str]) -> Dict[str, Any]:
         """Add attendees to an existing event"""
         try:
-            # Get the current event
+            # Get the current attendee list
             event = self.service.events().get(
                 calendarId='primary',
-                eventId=event_id
+                eventId=event_id,
+                fields='summary,attendees'
             ).execute()
             
             # Prepare attendees list
             current_attendees = event.get('attendees', [])
             current_emails = {attendee.get('email') for attendee in current_attendees}
             
-            # Add new attendees that aren't already in the list
-            for attendee in attendees:
-                if '@' in attendee and attendee not in current_emails:
-                    current_attendees.append({'email': attendee})
+            # Add new attendees that aren't already in the list (input
+            # duplicates collapse to one entry)
+            to_add = [
+                attendee for attendee in dict.fromkeys(attendees)
+                if '@' in attendee and attendee not in current_emails
+            ]
+            current_attendees.extend({'email': attendee} for attendee in to_add)
                     
-            # Update the event
-            event['attendees'] = current_attendees
-            updated_event = self.service.events().update(
+            # Patch just the attendee list
+            updated_event = self.service.events().patch(
                 calendarId='primary',
                 eventId=event_id,
-                body=event,
-                sendUpdates='all'
+                body={'attendees': current_attendees},
+                sendUpdates='all',
+                fields=_WRITE_FIELDS
             ).execute()
             
+            self.clear_event_cache()
             logger.info(f"Added attendees to event: {event.get('summary', '')}")
             return updated_event
         except Exception as e:
@@ -587,30 +836,33 @@ class CalendarManager:
     def remove_attendees_from_event(self, event_id: str, attendees: List[str]) -> Dict[str, Any]:
         """Remove attendees from an existing event"""
         try:
-            # Get the current event
+            # Get the current attendee list
             event = self.service.events().get(
                 calendarId='primary',
-                eventId=event_id
+                eventId=event_id,
+                fields='summary,attendees'
             ).execute()
             
             # Prepare attendees list
             current_attendees = event.get('attendees', [])
             
             # Remove specified attendees
+            remove_set = set(attendees)
             updated_attendees = [
                 attendee for attendee in current_attendees
-                if attendee.get('email') not in attendees
+                if attendee.get('email') not in remove_set
             ]
             
-            # Update the event
-            event['attendees'] = updated_attendees
-            updated_event = self.service.events().update(
+            # Patch just the attendee list
+            updated_event = self.service.events().patch(
                 calendarId='primary',
                 eventId=event_id,
-                body=event,
-                sendUpdates='all'
+                body={'attendees': updated_attendees},
+                sendUpdates='all',
+                fields=_WRITE_FIELDS
             ).execute()
             
+            self.clear_event_cache()
             logger.info(f"Removed attendees from event: {event.get('summary', '')}")
             return updated_event
         except Exception as e:
@@ -628,8 +880,9 @@ class CalendarManager:
                 return []
                 
             # Set default dates if not provided
+            now = datetime.now(self.timezone)
             if not start_date:
-                start_date = datetime.now(self.timezone)
+                start_date = now
             if not end_date:
                 end_date = start_date + timedelta(days=7)
                 
@@ -652,23 +905,28 @@ class CalendarManager:
                     end = datetime.fromisoformat(busy_time['end'].replace('Z', '+00:00'))
                     busy_periods.append((start, end))
                     
-            # Sort busy periods
-            busy_periods.sort()
+            # Today's earliest bookable slot is the start of the next hour
+            today = now.date()
+            next_hour = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+            
+            # Merge everyone's busy periods once into sorted, disjoint intervals
+            busy_periods = self._merge_busy_periods(busy_periods)
+            busy_ends = [end for _, end in busy_periods]
             
             # Find free periods that are at least as long as the requested duration
             suggestions = []
             current_date = start_date
             
-            # Iterate through each day in the range
-            while current_date.date() <= end_date.date():
+            # Iterate through each day in the range until enough slots are found
+            while current_date.date() <= end_date.date() and len(suggestions) < 5:
                 # Only consider working hours
                 day_start = current_date.replace(hour=working_hours[0], minute=0, second=0, microsecond=0)
                 day_end = current_date.replace(hour=working_hours[1], minute=0, second=0, microsecond=0)
                 
                 # If we're looking at the current day and it's already past the start of working hours,
                 # adjust day_start to be the current time
-                if current_date.date() == datetime.now(self.timezone).date() and datetime.now(self.timezone).hour >= working_hours[0]:
-                    day_start = max(day_start, datetime.now(self.timezone).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1))
+                if current_date.date() == today and now.hour >= working_hours[0]:
+                    day_start = max(day_start, next_hour)
                 
                 # Skip if we're already past working hours for the day
                 if day_start >= day_end:
@@ -681,105 +939,148 @@ class CalendarManager:
                     continue
                 
                 # Find free slots in this day
-                free_slots = self._find_free_slots(busy_periods, day_start, day_end, duration_minutes)
+                free_slots = self._find_free_slots(busy_periods, busy_ends, day_start, day_end,
+                                                   duration_minutes, 5 - len(suggestions))
                 suggestions.extend(free_slots)
                 
                 # Move to next day
                 current_date = current_date + timedelta(days=1)
                 
-            # Return the top suggestions
-            return suggestions[:5]  # Limit to 5 suggestions
+            # Return the top suggestions (at most 5)
+            return suggestions
         except Exception as e:
             logger.error(f"Error suggesting optimal meeting time: {str(e)}")
             return []
             
+    @staticmethod
+    def _merge_busy_periods(busy_periods: List[Tuple[datetime, datetime]]) -> List[Tuple[datetime, datetime]]:
+        """Sort busy periods and merge overlapping ones into disjoint intervals"""
+        merged = []
+        for start, end in sorted(busy_periods):
+            if merged and start <= merged[-1][1]:
+                if end > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        return merged
+        
     def _find_free_slots(self, busy_periods: List[Tuple[datetime, datetime]], 
+                        busy_ends: List[datetime],
                         day_start: datetime, day_end: datetime, 
-                        duration_minutes: int) -> List[Dict[str, Any]]:
-        """Find free time slots in a day given busy periods"""
+                        duration_minutes: int,
+                        max_slots: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Find free time slots in a day given merged busy periods and their end times"""
         free_slots = []
         current_time = day_start
+        duration = timedelta(minutes=duration_minutes)
         
-        # Filter busy periods to those that overlap with our day
-        relevant_busy = [
-            (max(start, day_start), min(end, day_end)) 
-            for start, end in busy_periods
-            if start < day_end and end > day_start
-        ]
-        
-        # Sort by start time
-        relevant_busy.sort()
+        # Skip straight to the first busy period still running at day_start
+        i = bisect.bisect_right(busy_ends, day_start)
         
-        # Find free slots
-        for start_busy, end_busy in relevant_busy:
-            if current_time < start_busy:
-                free_duration = (start_busy - current_time).total_seconds() / 60
-                if free_duration >= duration_minutes:
-                    free_slots.append({
-                        "start": current_time.isoformat(),
-                        "end": (current_time + timedelta(minutes=duration_minutes)).isoformat(),
-                        "confidence": 0.9
-                    })
-            current_time = max(current_time, end_busy)
-            
-        # Add final free slot if needed
-        if current_time < day_end:
-            free_duration = (day_end - current_time).total_seconds() / 60
-            if free_duration >= duration_minutes:
+        # Walk the busy periods that fall within the day
+        while i < len(busy_periods) and busy_periods[i][0] < day_end:
+            start_busy, end_busy = busy_periods[i]
+            if start_busy - current_time >= duration:
                 free_slots.append({
                     "start": current_time.isoformat(),
-                    "end": (current_time + timedelta(minutes=duration_minutes)).isoformat(),
+                    "end": (current_time + duration).isoformat(),
                     "confidence": 0.9
                 })
+                if len(free_slots) == max_slots:
+                    return free_slots
+            current_time = max(current_time, end_busy)
+            i += 1
+            
+        # Add final free slot if needed
+        if day_end - current_time >= duration:
+            free_slots.append({
+                "start": current_time.isoformat(),
+                "end": (current_time + duration).isoformat(),
+                "confidence": 0.9
+            })
                 
         return free_slots
     
     def _parse_event_datetime(self, datetime_obj: Dict[str, str]) -> datetime:
-        """Parse an event datetime object to a Python datetime"""
+        """Parse an event datetime object to a datetime in the calendar's timezone"""
         if 'dateTime' in datetime_obj:
             dt_str = datetime_obj['dateTime']
             # Handle various formats including those with Z or timezone offsets
             if dt_str.endswith('Z'):
-                dt = datetime.fromisoformat(dt_str[:-1])
-                dt = dt.replace(tzinfo=pytz.UTC)
-                return dt.astimezone(self.timezone)
+                dt = datetime.fromisoformat(dt_str[:-1]).replace(tzinfo=_UTC)
             else:
-                return datetime.fromisoformat(dt_str)
+                dt = datetime.fromisoformat(dt_str)
+            # Switch from the fixed offset in the string to the named zone, so
+            # later replace() calls get the right offset on either side of DST
+            return dt.astimezone(self.timezone) if dt.tzinfo else dt.replace(tzinfo=self.timezone)
         elif 'date' in datetime_obj:
             # All-day event
-            return datetime.strptime(datetime_obj['date'], '%Y-%m-%d')
+            return datetime.fromisoformat(datetime_obj['date']).replace(tzinfo=self.timezone)
         else:
             raise ValueError("Invalid datetime object format")
 
+    def _list_upcoming_events(self, max_results: int) -> List[Dict[str, Any]]:
+        """List events from the next 30 days through the shared response cache"""
+        # Truncate to the minute so reruns within a minute share a cache key
+        now = datetime.now(self.timezone).replace(second=0, microsecond=0)
+        return _fetch_events(
+            self.service,
+            self.config.TOKEN_FILE,
+            now.isoformat(),
+            (now + timedelta(days=30)).isoformat(),
+            max_results
+        )
+        
+    def clear_event_cache(self) -> None:
+        """Drop cached event listings and searches so the next read hits the API"""
+        _fetch_events.clear()
+        _search_events.clear()
+
+    def _iter_events(self, time_min: datetime, time_max: datetime, query: Optional[str] = None,
+                     page_size: int = 50) -> Iterator[Dict[str, Any]]:
+        """Yield events in a window, fetching further pages only as they are consumed"""
+        events = self.service.events()
+        request = events.list(
+            calendarId='primary',
+            timeMin=time_min.isoformat(),
+            timeMax=time_max.isoformat(),
+            maxResults=page_size,
+            singleEvents=True,
+            orderBy='startTime',
+            q=query,
+            fields=_PAGE_FIELDS
+        )
+        while request is not None:
+            response = request.execute()
+            yield from response.get('items', [])
+            request = events.list_next(request, response)
+
     def _find_matching_events(self, search_terms: str, max_results: int = 5):
         """Find events matching the search terms"""
         try:
-            # Get events from the next 30 days
-            time_min = datetime.now(self.timezone).isoformat()
-            time_max = (datetime.now(self.timezone) + timedelta(days=30)).isoformat()
-            
-            events_result = self.service.events().list(
-                calendarId='primary',
-                timeMin=time_min,
-                timeMax=time_max,
-                maxResults=max_results * 2,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            
-            events = events_result.get('items', [])
-            
-            # Create search pattern from terms
-            search_pattern = re.compile(search_terms, re.IGNORECASE)
+            # Plain words are also sent as a server-side full-text query, so
+            # only candidate events are downloaded; the substring test then
+            # keeps those matching in summary or description. Real patterns
+            # go through the regex engine over the unfiltered listing.
+            if _REGEX_META.search(search_terms):
+                query = None
+                matches = _compiled(search_terms).search
+            else:
+                query = search_terms
+                needle = search_terms.lower()
+                matches = lambda text: needle in text.lower()
             
-            # Filter events matching search terms
-            matching_events = [
-                event for event in events
-                if search_pattern.search(event.get('summary', '')) 
-                or search_pattern.search(event.get('description', ''))
-            ]
+            # Scan events from the next 30 days page by page, stopping as
+            # soon as enough matches are found
+            now = datetime.now(self.timezone)
+            matching_events = []
+            for event in self._iter_events(now, now + timedelta(days=30), query):
+                if matches(f"{event.get('summary', '')}\x00{event.get('description', '')}"):
+                    matching_events.append(event)
+                    if len(matching_events) >= max_results:
+                        break
             
-            return matching_events[:max_results]
+            return matching_events
             
         except Exception as e:
             st.error(f"Error finding events: {str(e)}")
@@ -788,33 +1089,19 @@ class CalendarManager:
     def get_upcoming_events(self, max_results: int = 10) -> List[str]:
         """Get a list of upcoming events formatted for display"""
         try:
-            now = datetime.now(self.timezone).isoformat()
-            future = (datetime.now(self.timezone) + timedelta(days=30)).isoformat()
-            
-            events_result = self.service.events().list(
-                calendarId='primary',
-                timeMin=now,
-                timeMax=future,
-                maxResults=max_results,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            
-            events = events_result.get('items', [])
+            events = self._list_upcoming_events(max_results)
             
             if not events:
                 return []
                 
             # Format events for display
-            formatted_events = []
-            for event in events:
-                start = event['start'].get('dateTime', event['start'].get('date'))
-                start_dt = datetime.fromisoformat(start).astimezone(self.timezone)
-                
-                formatted_start = start_dt.strftime('%I:%M %p on %B %d, %Y')
-                formatted_events.append(f"{event['summary']} at {formatted_start}")
-                
-            return formatted_events
+            tz = self.timezone
+            parse = datetime.fromisoformat
+            return [
+                f"{event['summary']} at "
+                f"{parse(event['start'].get('dateTime', event['start'].get('date'))).astimezone(tz).strftime(_UPCOMING_FMT)}"
+                for event in events
+            ]
             
         except Exception as e:
             st.error(f"Error retrieving events: {str(e)}")
@@ -1,5 +1,6 @@
 import os
-import pytz
+import functools
+from zoneinfo import ZoneInfo
 from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
 from enum import Enum, auto
@@ -22,6 +23,11 @@ class RecurrenceFrequency(Enum):
     MONTHLY = "MONTHLY"
     YEARLY = "YEARLY"
 
+@functools.lru_cache(maxsize=64)
+def get_timezone(name: str) -> ZoneInfo:
+    """Resolve a timezone name once per process"""
+    return ZoneInfo(name)
+
 @dataclass
 class TwilioConfig:
     ENABLED: bool = False
@@ -40,7 +46,8 @@ class CalendarConfig:
     TIMEZONE: str = 'America/Denver'
     SCOPES: List[str] = None
     CREDENTIALS_FILE: str = 'credentials.json'
-    TOKEN_FILE: str = 'token.pickle'
+    TOKEN_FILE: str = 'token.json'
+    LEGACY_TOKEN_FILE: str = 'token.pickle'
     PRIMARY_CALENDAR_ID: str = 'primary'
     MAX_RECURRING_EVENTS: int = 365
     SUPPORTED_TIMEZONES: List[str] = field(default_factory=lambda: [
@@ -87,13 +94,17 @@ class AppConfig:
     ])
     ENABLE_ANALYTICS: bool = True
     
-    def get_timezone_obj(self) -> pytz.timezone:
+    def get_timezone_obj(self) -> ZoneInfo:
         """Get the timezone object for the configured timezone"""
-        return pytz.timezone(self.CALENDAR_CONFIG.TIMEZONE)
+        return get_timezone(self.CALENDAR_CONFIG.TIMEZONE)
     
-    def get_all_timezone_choices(self) -> List[Dict[str, str]]:
-        """Get a list of timezone choices for the UI"""
+    @functools.cached_property
+    def _timezone_choices(self) -> List[Dict[str, str]]:
         return [
             {"label": tz.replace('_', ' '), "value": tz} 
             for tz in self.CALENDAR_CONFIG.SUPPORTED_TIMEZONES
         ]
+    
+    def get_all_timezone_choices(self) -> List[Dict[str, str]]:
+        """Get a list of timezone choices for the UI, built once per config"""
+        return self._timezone_choices
@@ -1,34 +1,96 @@
 from datetime import datetime, timedelta
-import pytz
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from openai import OpenAI, RateLimitError, APIConnectionError, APITimeoutError
 import json
 import streamlit as st
 from typing import Dict, List, Any, Optional, Tuple, Set, Union
 import re
 import logging
 import pandas as pd
-from config import AppConfig, AIConfig
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
+from config import AppConfig, AIConfig, get_timezone
 from utils import extract_attendees_from_text, get_weather_for_event
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Download NLTK resources if not already available
-try:
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('punkt', quiet=True)
-    nltk.download('stopwords', quiet=True)
+# Tool schemas sent with every request. Descriptions are kept only where the
+# field name and type leave the expected value ambiguous, since every word
+# here is billed as prompt tokens on each call.
+_CREATE_EVENT_TOOL = {"type": "function", "function": {
+    "name": "create_calendar_event",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string"},
+            "date": {"type": "string", "description": "YYYY-MM-DD"},
+            "time": {"type": "string", "description": "HH:MM, 24-hour"},
+            "duration": {"type": "integer", "description": "Minutes"},
+            "description": {"type": "string"},
+            "location": {"type": "string", "description": "Only if mentioned"},
+            "attendees": {"type": "array", "items": {"type": "string"}},
+            "is_recurring": {"type": "boolean"},
+            "recurrence_pattern": {
+                "type": "string",
+                "enum": ["DAILY", "WEEKLY", "BIWEEKLY", "MONTHLY", "YEARLY"]
+            },
+            "reminder_minutes": {"type": "integer", "description": "Minutes before the event"}
+        },
+        "required": ["title", "date", "time", "duration"]
+    }
+}}
+
+_PREPARATION_TOOL = {"type": "function", "function": {
+    "name": "suggest_preparation_tasks",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "tasks": {"type": "array", "items": {"type": "string"}}
+        },
+        "required": ["tasks"]
+    }
+}}
+
+_EDIT_EVENT_TOOL = {"type": "function", "function": {
+    "name": "edit_calendar_event",
+    "description": "Set new_* fields only for values being changed",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "search_terms": {"type": "string", "description": "Keywords identifying the event"},
+            "new_date": {"type": "string", "description": "YYYY-MM-DD"},
+            "new_time": {"type": "string", "description": "HH:MM"},
+            "new_duration": {"type": "integer", "description": "Minutes"},
+            "new_title": {"type": "string"},
+            "new_description": {"type": "string"},
+            "new_location": {"type": "string"},
+            "add_attendees": {"type": "array", "items": {"type": "string"}},
+            "remove_attendees": {"type": "array", "items": {"type": "string"}},
+            "action": {"type": "string", "enum": ["reschedule", "modify", "cancel"]}
+        },
+        "required": ["search_terms", "action"]
+    }
+}}
+
+@st.cache_data(ttl=3600, max_entries=2048, show_spinner=False)
+def _cached_tool_arguments(_client: OpenAI, request: str, day: str) -> str:
+    """Run a forced tool call once per identical request and day, returning its raw arguments"""
+    response = _client.chat.completions.create(**json.loads(request))
+    return response.choices[0].message.tool_calls[0].function.arguments
 
 class EventProcessor:
     def __init__(self, timezone: str, api_key: str = None):
         """Initialize the event processor with timezone and API key"""
-        self.timezone = pytz.timezone(timezone)
+        self.timezone = get_timezone(timezone)
+        
+        # Enhanced context for better understanding; only the date changes per request
+        self._create_prompt = f"""You are a calendar assistant for {self.timezone.key.replace('_', ' ')}. 
+                Convert user requests into structured event details. The current date is {{current_date}}.
+                Be intelligent about inferring meeting locations, attendees, and other details.
+                If the input mentions a location like "at office" or "at Starbucks", capture it.
+                If attendees are mentioned, extract them as a list.
+                If the event repeats (like "every Monday" or "weekly"), indicate it's recurring."""
+        
         self.app_config = AppConfig()
         self.ai_config = self.app_config.AI_CONFIG
         
@@ -59,7 +121,22 @@ class EventProcessor:
             st.error(error_msg)
             self.openai_client = None
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_exception_type((RateLimitError, APIConnectionError, APITimeoutError)),
+        reraise=True
+    )
+    def _tool_arguments(self, **request) -> Dict[str, Any]:
+        """Make a forced tool call, reusing the answer to an identical request made earlier today"""
+        # Keyed on the local date as well, since answers to relative phrasings
+        # like "tomorrow" are only valid on the day they were resolved
+        return json.loads(_cached_tool_arguments(
+            self.openai_client,
+            json.dumps(request, sort_keys=True),
+            datetime.now(self.timezone).date().isoformat()
+        ))
+    
     def process_create_command(self, user_input: str) -> Optional[Dict[str, Any]]:
         """Process natural language commands to create a calendar event"""
         try:
@@ -68,16 +145,9 @@ class EventProcessor:
                 raise ValueError("OpenAI client not initialized. Check your API key.")
                 
             current_date = datetime.now(self.timezone).strftime('%Y-%m-%d')
+            system_prompt = self._create_prompt.format(current_date=current_date)
             
-            # Enhanced context for better understanding
-            system_prompt = f"""You are a calendar assistant for {self.timezone.zone.replace('_', ' ')}. 
-                Convert user requests into structured event details. The current date is {current_date}.
-                Be intelligent about inferring meeting locations, attendees, and other details.
-                If the input mentions a location like "at office" or "at Starbucks", capture it.
-                If attendees are mentioned, extract them as a list.
-                If the event repeats (like "every Monday" or "weekly"), indicate it's recurring."""
-            
-            response = self.openai_client.chat.completions.create(
+            event_details = self._tool_arguments(
                 model=self.ai_config.MODEL,
                 temperature=self.ai_config.TEMPERATURE,
                 max_tokens=self.ai_config.MAX_TOKENS,
@@ -85,51 +155,29 @@ class EventProcessor:
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": f"Convert this request into a calendar event: {user_input}"}
                 ],
-                functions=[{
-                    "name": "create_calendar_event",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "title": {"type": "string", "description": "Title of the event"},
-                            "date": {"type": "string", "description": "Date in YYYY-MM-DD format"},
-                            "time": {"type": "string", "description": "Time in HH:MM format (24-hour)"},
-                            "duration": {"type": "integer", "description": "Duration in minutes"},
-                            "description": {"type": "string", "description": "Description of the event"},
-                            "location": {"type": "string", "description": "Location of the event if mentioned"},
-                            "attendees": {
-                                "type": "array", 
-                                "items": {"type": "string"},
-                                "description": "List of attendees if mentioned"
-                            },
-                            "is_recurring": {"type": "boolean", "description": "Whether the event repeats"},
-                            "recurrence_pattern": {
-                                "type": "string",
-                                "enum": ["DAILY", "WEEKLY", "BIWEEKLY", "MONTHLY", "YEARLY"],
-                                "description": "How often the event repeats, if it's recurring"
-                            },
-                            "reminder_minutes": {"type": "integer", "description": "Minutes before event to send reminder"}
-                        },
-                        "required": ["title", "date", "time", "duration"]
-                    }
-                }],
-                function_call={"name": "create_calendar_event"}
+                tools=[_CREATE_EVENT_TOOL],
+                tool_choice={"type": "function", "function": {"name": "create_calendar_event"}}
             )
             
-            event_details = json.loads(response.choices[0].message.function_call.arguments)
-            
-            # Add weather information if a location is provided
-            if 'location' in event_details and self.app_config.WEATHER_CONFIG.ENABLED:
-                weather = get_weather_for_event(
-                    event_details['date'], 
-                    event_details['time'], 
-                    event_details.get('location')
-                )
-                if weather['status'] == 'success':
-                    event_details['weather'] = weather
-            
-            # Suggest related to-dos if it's a meeting
-            if self.ai_config.SUGGESTION_MODE and 'meeting' in event_details['title'].lower():
-                suggestions = self._suggest_meeting_preparation(event_details)
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                # Look up the weather in the background if a location is provided,
+                # so it overlaps with the meeting preparation call below
+                weather = None
+                if 'location' in event_details and self.app_config.WEATHER_CONFIG.ENABLED:
+                    weather = pool.submit(
+                        get_weather_for_event,
+                        event_details['date'], 
+                        event_details['time'], 
+                        event_details.get('location')
+                    )
+                
+                # Suggest related to-dos if it's a meeting
+                suggestions = None
+                if self.ai_config.SUGGESTION_MODE and 'meeting' in event_details['title'].lower():
+                    suggestions = self._suggest_meeting_preparation(event_details)
+                
+                if weather and weather.result()['status'] == 'success':
+                    event_details['weather'] = weather.result()
                 if suggestions:
                     event_details['suggested_todos'] = suggestions
             
@@ -154,36 +202,20 @@ class EventProcessor:
                 logger.error("OpenAI client not initialized. Cannot suggest meeting preparation.")
                 return []
                 
-            response = self.openai_client.chat.completions.create(
+            return self._tool_arguments(
                 model=self.ai_config.MODEL,
                 temperature=0.7,
                 messages=[
                     {"role": "system", "content": "You are an assistant that suggests preparation tasks for meetings."},
                     {"role": "user", "content": f"Suggest 3 preparation tasks for this meeting: {json.dumps(event_details)}"}
                 ],
-                functions=[{
-                    "name": "suggest_preparation_tasks",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "tasks": {
-                                "type": "array",
-                                "items": {"type": "string"},
-                                "description": "List of preparation tasks"
-                            }
-                        },
-                        "required": ["tasks"]
-                    }
-                }],
-                function_call={"name": "suggest_preparation_tasks"}
-            )
-            
-            return json.loads(response.choices[0].message.function_call.arguments)['tasks']
+                tools=[_PREPARATION_TOOL],
+                tool_choice={"type": "function", "function": {"name": "suggest_preparation_tasks"}}
+            )['tasks']
         except Exception as e:
             logger.error(f"Error suggesting meeting preparation: {str(e)}")
             return []
             
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     def process_edit_command(self, user_input: str) -> Optional[Dict[str, Any]]:
         """Process natural language commands to edit a calendar event"""
         try:
@@ -191,7 +223,7 @@ class EventProcessor:
             if not self.openai_client:
                 raise ValueError("OpenAI client not initialized. Check your API key.")
                 
-            response = self.openai_client.chat.completions.create(
+            return self._tool_arguments(
                 model=self.ai_config.MODEL,
                 temperature=self.ai_config.TEMPERATURE,
                 messages=[
@@ -202,62 +234,9 @@ class EventProcessor:
                      and the new date/time details precisely."""},
                     {"role": "user", "content": f"Process this calendar edit request: {user_input}"}
                 ],
-                functions=[{
-                    "name": "edit_calendar_event",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "search_terms": {
-                                "type": "string",
-                                "description": "Keywords to identify the event"
-                            },
-                            "new_date": {
-                                "type": "string",
-                                "description": "New date if changing (YYYY-MM-DD format)"
-                            },
-                            "new_time": {
-                                "type": "string",
-                                "description": "New time if changing (HH:MM format)"
-                            },
-                            "new_duration": {
-                                "type": "integer",
-                                "description": "New duration in minutes if changing"
-                            },
-                            "new_title": {
-                                "type": "string",
-                                "description": "New title if changing"
-                            },
-                            "new_description": {
-                                "type": "string",
-                                "description": "New description if changing"
-                            },
-                            "new_location": {
-                                "type": "string",
-                                "description": "New location if changing"
-                            },
-                            "add_attendees": {
-                                "type": "array",
-                                "items": {"type": "string"},
-                                "description": "Attendees to add to the event"
-                            },
-                            "remove_attendees": {
-                                "type": "array",
-                                "items": {"type": "string"},
-                                "description": "Attendees to remove from the event"
-                            },
-                            "action": {
-                                "type": "string",
-                                "enum": ["reschedule", "modify", "cancel"],
-                                "description": "Type of edit action"
-                            }
-                        },
-                        "required": ["search_terms", "action"]
-                    }
-                }],
-                function_call={"name": "edit_calendar_event"}
+                tools=[_EDIT_EVENT_TOOL],
+                tool_choice={"type": "function", "function": {"name": "edit_calendar_event"}}
             )
-            
-            return json.loads(response.choices[0].message.function_call.arguments)
         except Exception as e:
             logger.error(f"Error processing edit request: {str(e)}")
             st.error(f"Error processing edit request: {str(e)}")
@@ -272,22 +251,21 @@ class EventProcessor:
             # 2. Find common free time slots
             # 3. Rank according to the priority (earliest, latest, most convenient)
             
-            # For now, we'll return some dummy suggestions
-            now = datetime.now(self.timezone)
-            suggestions = []
+            # For now, we'll return some dummy suggestions: 9, 10 and 11 AM
+            # on the next weekday
+            day = datetime.now(self.timezone).replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+            if day.weekday() >= 5:  # Skip weekends
+                day += timedelta(days=7-day.weekday())
             
-            for i in range(3):
-                suggestion_time = now.replace(hour=9+i, minute=0, second=0, microsecond=0) + timedelta(days=1)
-                if suggestion_time.weekday() >= 5:  # Skip weekends
-                    suggestion_time += timedelta(days=7-suggestion_time.weekday())
-                
-                suggestions.append({
-                    "start": suggestion_time.isoformat(),
-                    "end": (suggestion_time + timedelta(minutes=duration)).isoformat(),
+            starts = [day.replace(hour=9+i) for i in range(3)]
+            return [
+                {
+                    "start": start.isoformat(),
+                    "end": (start + timedelta(minutes=duration)).isoformat(),
                     "confidence": 0.9 - (i * 0.2)
-                })
-                
-            return suggestions
+                }
+                for i, start in enumerate(starts)
+            ]
         except Exception as e:
             logger.error(f"Error suggesting meeting times: {str(e)}")
             return []
@@ -295,16 +273,12 @@ class EventProcessor:
     def generate_event_summary(self, event_details: Dict[str, Any]) -> str:
         """Generate a human-friendly summary of an event"""
         try:
-            # Format the datetime in a readable format
-            date_obj = datetime.strptime(event_details['date'], '%Y-%m-%d')
-            date_str = date_obj.strftime('%A, %B %d, %Y')
-            
-            # Handle 24-hour time format
-            time_obj = datetime.strptime(event_details['time'], '%H:%M')
-            time_str = time_obj.strftime('%I:%M %p').lstrip('0')
+            # Parse the 24-hour start once and format everything from it
+            start_datetime = datetime.strptime(f"{event_details['date']} {event_details['time']}", '%Y-%m-%d %H:%M')
+            date_str = start_datetime.strftime('%A, %B %d, %Y')
+            time_str = start_datetime.strftime('%I:%M %p').lstrip('0')
             
             # Calculate end time
-            start_datetime = datetime.strptime(f"{event_details['date']} {event_details['time']}", '%Y-%m-%d %H:%M')
             end_datetime = start_datetime + timedelta(minutes=event_details['duration'])
             end_time_str = end_datetime.strftime('%I:%M %p').lstrip('0')
             
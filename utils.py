@@ -1,23 +1,43 @@
 import os
 import re
+import bisect
+import functools
 import json
 import logging
 import requests
 import datetime
-import pytz
 import pandas as pd
 import pyshorteners
 import geocoder
 from typing import Dict, List, Any, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from config import AppConfig, NotificationMethod
 from twilio.rest import Client
-from icalendar import Calendar, Event as ICalEvent
+from icalendar import Calendar, Event as ICalEvent, Alarm
 from io import BytesIO
 from PIL import Image
 
 logger = logging.getLogger(__name__)
 
+# Application configuration shared by the helpers below
+app_config = AppConfig()
+
+# (connect, read) timeout in seconds for outbound HTTP calls
+HTTP_TIMEOUT = (3, 10)
+
+# How long a fetched weather forecast is reused for the same location
+FORECAST_CACHE_SECONDS = 600
+
+# Shared session so repeated weather lookups reuse pooled connections
+_http = requests.Session()
+
+# Background workers for location lookups that may not be needed
+_lookup_pool = ThreadPoolExecutor(max_workers=4)
+
+# Names introduced by "with", "@" or "invite" in event descriptions
+_ATTENDEE_PATTERN = re.compile(r'(?:with\s+|@\s*|invite\s+)([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2})')
+
 def get_user_location() -> Tuple[Optional[float], Optional[float]]:
     """Attempt to get the user's current location based on IP"""
     try:
@@ -29,9 +49,20 @@ def get_user_location() -> Tuple[Optional[float], Optional[float]]:
         logger.error(f"Error getting user location: {str(e)}")
         return None, None
 
+@functools.lru_cache(maxsize=256)
+def _fetch_forecast(lat: float, lng: float, api_key: str, units: str, bucket: int) -> List[Dict[str, Any]]:
+    """Fetch the 5-day forecast list for a location; bucket expires the cached entry"""
+    response = _http.get(
+        "https://api.openweathermap.org/data/2.5/forecast",
+        params={"lat": lat, "lon": lng, "appid": api_key, "units": units},
+        timeout=HTTP_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json().get("list", [])
+
 def get_weather_for_event(date: str, time: str, location: Optional[str] = None) -> Dict[str, Any]:
     """Get weather forecast for the event date, time and location"""
-    config = AppConfig().WEATHER_CONFIG
+    config = app_config.WEATHER_CONFIG
     if not config.ENABLED or not config.API_KEY:
         return {"status": "disabled"}
     
@@ -44,49 +75,44 @@ def get_weather_for_event(date: str, time: str, location: Optional[str] = None)
         if (event_datetime - now).days > 7:
             return {"status": "too_far_ahead"}
         
-        # Determine location
+        # Determine location; the IP-based fallback starts alongside
+        # geocoding so a failed geocode doesn't add another round trip
         lat, lng = None, None
         if location:
+            fallback = _lookup_pool.submit(get_user_location)
             g = geocoder.osm(location)
             if g.ok:
                 lat, lng = g.lat, g.lng
-        
-        if not lat or not lng:
+            if not lat or not lng:
+                lat, lng = fallback.result()
+        else:
             lat, lng = get_user_location()
             
         if not lat or not lng:
             return {"status": "no_location"}
             
-        # Call weather API
-        url = f"https://api.openweathermap.org/data/2.5/forecast"
-        params = {
-            "lat": lat,
-            "lon": lng,
-            "appid": config.API_KEY,
-            "units": config.UNITS
-        }
-        
-        response = requests.get(url, params=params)
-        if response.status_code != 200:
-            return {"status": "api_error", "error": response.text}
-            
-        data = response.json()
-        
-        # Find the forecast closest to the event time
-        forecasts = data.get("list", [])
-        closest_forecast = None
-        min_diff = float('inf')
+        # Call weather API, reusing forecasts fetched for roughly the same
+        # place within the last few minutes
+        try:
+            forecasts = _fetch_forecast(
+                round(lat, 2), round(lng, 2), config.API_KEY, config.UNITS,
+                int(now.timestamp() // FORECAST_CACHE_SECONDS)
+            )
+        except requests.HTTPError as e:
+            return {"status": "api_error", "error": e.response.text}
         
-        for forecast in forecasts:
-            forecast_time = datetime.fromtimestamp(forecast["dt"])
-            diff = abs((forecast_time - event_datetime).total_seconds())
-            if diff < min_diff:
-                min_diff = diff
-                closest_forecast = forecast
-                
-        if not closest_forecast:
+        # Find the forecast closest to the event time; entries come in
+        # ascending timestamp order, so bisect to the two neighbours
+        if not forecasts:
             return {"status": "no_forecast"}
             
+        timestamps = [forecast["dt"] for forecast in forecasts]
+        target = event_datetime.timestamp()
+        i = bisect.bisect_left(timestamps, target)
+        if i == len(timestamps) or (i > 0 and target - timestamps[i - 1] <= timestamps[i] - target):
+            i -= 1
+        closest_forecast = forecasts[i]
+            
         # Format response
         weather = closest_forecast["weather"][0]
         temp = closest_forecast["main"]["temp"]
@@ -107,7 +133,7 @@ def get_weather_for_event(date: str, time: str, location: Optional[str] = None)
 
 def send_notification(phone: str, message: str) -> Dict[str, Any]:
     """Send SMS notification via Twilio"""
-    config = AppConfig().TWILIO_CONFIG
+    config = app_config.TWILIO_CONFIG
     if not config.ENABLED or not all([config.ACCOUNT_SID, config.AUTH_TOKEN, config.FROM_NUMBER]):
         return {"status": "disabled"}
     
@@ -139,9 +165,7 @@ def create_ical_event(event_details: Dict[str, Any]) -> bytes:
         start_datetime = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
         
         # Add timezone information
-        config = AppConfig()
-        timezone = config.get_timezone_obj()
-        start_datetime = timezone.localize(start_datetime)
+        start_datetime = start_datetime.replace(tzinfo=app_config.get_timezone_obj())
         
         # Calculate end time
         end_datetime = start_datetime + timedelta(minutes=event_details['duration'])
@@ -166,7 +190,7 @@ def create_ical_event(event_details: Dict[str, Any]) -> bytes:
             
         # Add alarm/reminder
         if event_details.get('reminder_minutes'):
-            alarm = icalendar.Alarm()
+            alarm = Alarm()
             alarm.add('action', 'DISPLAY')
             alarm.add('description', f"Reminder: {event_details['title']}")
             alarm.add('trigger', timedelta(minutes=-event_details['reminder_minutes']))
@@ -180,8 +204,7 @@ def create_ical_event(event_details: Dict[str, Any]) -> bytes:
 
 def shorten_url(url: str) -> str:
     """Shorten a URL using TinyURL service"""
-    config = AppConfig()
-    if not config.SHORT_URL_SERVICE:
+    if not app_config.SHORT_URL_SERVICE:
         return url
         
     try:
@@ -191,6 +214,10 @@ def shorten_url(url: str) -> str:
         logger.error(f"Error shortening URL: {str(e)}")
         return url
 
+def _event_times(column: pd.Series) -> pd.Series:
+    """Parse a column of Google start/end objects, using the date of all-day events"""
+    return pd.to_datetime(column.str.get('dateTime').fillna(column.str.get('date')))
+
 def analyze_calendar_habits(events: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Analyze calendar usage patterns and return insights"""
     try:
@@ -206,7 +233,7 @@ def analyze_calendar_habits(events: List[Dict[str, Any]]) -> Dict[str, Any]:
         
         # Time analysis
         if 'start' in df.columns:
-            df['start_dt'] = pd.to_datetime(df['start'].apply(lambda x: x.get('dateTime', x.get('date'))))
+            df['start_dt'] = _event_times(df['start'])
             df['hour'] = df['start_dt'].dt.hour
             df['day_of_week'] = df['start_dt'].dt.day_name()
             
@@ -215,7 +242,7 @@ def analyze_calendar_habits(events: List[Dict[str, Any]]) -> Dict[str, Any]:
             
             # Calculate average event duration
             if 'end' in df.columns:
-                df['end_dt'] = pd.to_datetime(df['end'].apply(lambda x: x.get('dateTime', x.get('date'))))
+                df['end_dt'] = _event_times(df['end'])
                 df['duration_mins'] = (df['end_dt'] - df['start_dt']).dt.total_seconds() / 60
                 avg_duration = df['duration_mins'].mean()
             else:
@@ -262,17 +289,4 @@ def generate_sharing_image(event_details: Dict[str, Any]) -> BytesIO:
 
 def extract_attendees_from_text(text: str) -> List[str]:
     """Extract potential attendees from text using pattern matching"""
-    # Common patterns for names in event descriptions
-    name_patterns = [
-        r'with\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2})',
-        r'@\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2})',
-        r'invite\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2})'
-    ]
-    
-    attendees = []
-    for pattern in name_patterns:
-        matches = re.finditer(pattern, text)
-        for match in matches:
-            attendees.append(match.group(1).strip())
-            
-    return list(set(attendees))  # Remove duplicates 
\ No newline at end of file
+    return list({name.strip() for name in _ATTENDEE_PATTERN.findall(text)})  # Remove duplicates